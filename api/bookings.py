@@ -1,19 +1,20 @@
+import time
 import aiohttp
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, Union, List
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload, joinedload
-from aio_pika import connect_robust, Message
 import json
 
-from database.database import get_db, AsyncSession
-from database.models import Booking, Place, Member
-from api.utils.auth_tools import get_current_member
+from database.database import get_db, get_read_db, AsyncSession
+from database.models import Booking, Place
+from api.utils.auth_tools import CurrentMember, get_current_member
+from api.utils.metrics import QUEUE_PUBLISH_LATENCY, TELEGRAM_SEND_LATENCY
 from config import (
     rabbitmq_url,
     CALL_QUEUE,
@@ -21,31 +22,48 @@ from config import (
     telegram_token,
     booking_failure_state,
     booking_success_state,
+    BOOKINGS_HISTORY_DAYS,
 )
 from api.utils.logger import logger  # ✅ логгер
 
 router = APIRouter()
 
 
-async def put_into_queue(booking_id: UUID, available_online: bool):
+async def put_into_queue(
+    booking_id: UUID, booking_date: datetime, available_online: bool
+):
     queue_name = PARS_QUEUE if available_online else CALL_QUEUE
-    logger.info(f"📤 Отправка booking_id={booking_id} в очередь {queue_name}")
+    logger.info("📤 Отправка booking_id=%s в очередь %s", booking_id, queue_name)
 
+    started = time.perf_counter()
     try:
+        # aio_pika нужен только при создании брони — не грузим его на старте
+        from aio_pika import connect_robust, Message
+
         conn = await connect_robust(rabbitmq_url)
         channel = await conn.channel()
         await channel.set_qos(prefetch_count=1)
         await channel.declare_queue(queue_name, durable=True)
 
-        body = json.dumps({"booking_id": str(booking_id)})
+        # booking_date возвращается в update_status, чтобы поиск брони
+        # затрагивал только одну секцию таблицы bookings
+        body = json.dumps(
+            {"booking_id": str(booking_id), "booking_date": booking_date.isoformat()}
+        )
         await channel.default_exchange.publish(
             Message(body.encode(), content_type="application/json"),
             routing_key=queue_name,
         )
         await conn.close()
+        QUEUE_PUBLISH_LATENCY.labels(queue_name, "ok").observe(
+            time.perf_counter() - started
+        )
         logger.info("✅ Успешно отправлено в очередь")
     except Exception as e:
-        logger.error(f"❌ Ошибка при отправке в очередь: {e}")
+        QUEUE_PUBLISH_LATENCY.labels(queue_name, "error").observe(
+            time.perf_counter() - started
+        )
+        logger.error("❌ Ошибка при отправке в очередь: %s", e)
         raise
 
 
@@ -63,15 +81,15 @@ class BookingCreate(BaseModel):
 async def create_booking(
     booking: BookingCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: Member = Depends(get_current_member),
+    current_user: CurrentMember = Depends(get_current_member),
 ):
-    logger.info(f"📥 Новое бронирование от пользователя {current_user.id}")
+    logger.info("📥 Новое бронирование от пользователя %s", current_user.id)
 
     try:
         result = await db.execute(select(Place).where(Place.id == booking.place_id))
         place = result.scalars().first()
         if not place:
-            logger.warning(f"❗ Место не найдено: {booking.place_id}")
+            logger.warning("❗ Место не найдено: %s", booking.place_id)
             raise HTTPException(status_code=404, detail="Place not found")
 
         db_booking = Booking(
@@ -88,8 +106,10 @@ async def create_booking(
         await db.commit()
         await db.refresh(db_booking)
 
-        logger.info(f"✅ Бронирование создано: {db_booking.id}")
-        await put_into_queue(db_booking.id, place.available_online)
+        logger.info("✅ Бронирование создано: %s", db_booking.id)
+        await put_into_queue(
+            db_booking.id, db_booking.booking_date, place.available_online
+        )
 
         return JSONResponse(
             status_code=200,
@@ -98,7 +118,7 @@ async def create_booking(
 
     except Exception as e:
         await db.rollback()
-        logger.error(f"❌ Ошибка при создании бронирования: {e}")
+        logger.error("❌ Ошибка при создании бронирования: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
 
 
@@ -164,15 +184,18 @@ class BookingResponse(BaseModel):
 
 @router.get("/bookings")
 async def get_all_bookings(
-    db: AsyncSession = Depends(get_db),
+    history_days: int = Query(BOOKINGS_HISTORY_DAYS, ge=0),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_member),
 ):
     try:
-        logger.info(f"📄 Получение бронирований для пользователя {current_user.id}")
+        logger.info("📄 Получение бронирований для пользователя %s", current_user.id)
 
+        # ограничение по booking_date отсекает старые секции bookings
+        since = datetime.utcnow() - timedelta(days=history_days)
         stmt = (
             select(Booking)
-            .where(Booking.user_id == current_user.id)
+            .where(Booking.user_id == current_user.id, Booking.booking_date >= since)
             .options(
                 selectinload(Booking.member),
                 selectinload(Booking.place).options(
@@ -197,7 +220,7 @@ async def get_all_bookings(
             else:
                 upcoming_bookings.append(serialized)
 
-        logger.info(f"✅ Найдено {len(bookings)} бронирований")
+        logger.info("✅ Найдено %s бронирований", len(bookings))
         return {
             "upcoming_bookings": upcoming_bookings,
             "past_bookings": past_bookings,
@@ -205,13 +228,14 @@ async def get_all_bookings(
         }
 
     except Exception as e:
-        logger.error(f"❌ Ошибка при получении бронирований: {e}")
+        logger.error("❌ Ошибка при получении бронирований: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 class BookingStatusUpdate(BaseModel):
     booking_id: UUID
     status: str
+    booking_date: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -225,13 +249,18 @@ async def send_telegram_message(chat_id: str, text: str):
         "parse_mode": "HTML",
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=payload) as resp:
-            if resp.status != 200:
-                response_text = await resp.text()
-                raise Exception(
-                    f"Ошибка отправки в Telegram: {resp.status} - {response_text}"
-                )
+    started, outcome = time.perf_counter(), "error"
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, json=payload) as resp:
+                if resp.status != 200:
+                    response_text = await resp.text()
+                    raise Exception(
+                        f"Ошибка отправки в Telegram: {resp.status} - {response_text}"
+                    )
+        outcome = "ok"
+    finally:
+        TELEGRAM_SEND_LATENCY.labels(outcome).observe(time.perf_counter() - started)
 
 
 @router.post("/bookings/update_status")
@@ -239,17 +268,20 @@ async def update_booking_status(
     data: BookingStatusUpdate,
     db: AsyncSession = Depends(get_db),
 ):
-    logger.info(f"🔄 Обновление статуса брони {data.booking_id} → {data.status}")
+    logger.info("🔄 Обновление статуса брони %s → %s", data.booking_id, data.status)
     try:
-        result = await db.execute(
+        stmt = (
             select(Booking)
             .options(joinedload(Booking.member), joinedload(Booking.place))
             .where(Booking.id == data.booking_id)
         )
+        if data.booking_date:
+            stmt = stmt.where(Booking.booking_date == data.booking_date)
+        result = await db.execute(stmt)
         booking = result.scalars().first()
 
         if not booking:
-            logger.warning(f"❗ Бронь не найдена: {data.booking_id}")
+            logger.warning("❗ Бронь не найдена: %s", data.booking_id)
             raise HTTPException(status_code=404, detail="Booking not found")
 
         short_id = str(booking.id)[-4:]
@@ -283,9 +315,11 @@ async def update_booking_status(
             await send_telegram_message(
                 booking.member.telegram_id, user_message
             )
-            logger.info(f"📩 Уведомление отправлено Telegram ID {booking.member.telegram_id}")
+            logger.info(
+                "📩 Уведомление отправлено Telegram ID %s", booking.member.telegram_id
+            )
         except Exception as e:
-            logger.warning(f"⚠️ Ошибка отправки сообщения Telegram: {e}")
+            logger.warning("⚠️ Ошибка отправки сообщения Telegram: %s", e)
 
         return JSONResponse(
             status_code=200,
@@ -294,5 +328,5 @@ async def update_booking_status(
 
     except Exception as e:
         await db.rollback()
-        logger.error(f"❌ Ошибка обновления статуса бронирования: {e}")
+        logger.error("❌ Ошибка обновления статуса бронирования: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,16 +1,18 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, literal_column, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.database import get_db
+from database.database import get_db, get_read_db
 from database.models import Member
 from api.utils.auth_tools import (
+    CurrentMember,
     create_tokens,
     decode_token,
     get_current_member,
-    parse_validate_raw,
+    invalidate_member,
     validate_web_app_data,
 )
 from api.utils.schemas import TelegramAuth, RefreshRequest
@@ -26,34 +28,52 @@ async def login_via_telegram(
 ):
     try:
         if "init_data" in payload:
-            raw = validate_web_app_data(payload.get("init_data"))
-            validated = parse_validate_raw(raw)
-            user_data = validated["user"]
-            ta = TelegramAuth(**user_data)
+            validated = validate_web_app_data(payload.get("init_data"))
+            ta = TelegramAuth(**validated["user"])
         else:
             ta = TelegramAuth(**payload)
 
         telegram_id = ta.id
-        logger.info(f"📲 Авторизация Telegram ID: {telegram_id}")
-
-        q = await db.execute(select(Member).filter_by(telegram_id=telegram_id))
-        user = q.scalars().first()
-
-        if not user:
-            logger.info(f"🆕 Новый пользователь: {ta.username or ta.first_name}")
-            user = Member(
-                telegram_id=telegram_id,
-                username=ta.username,
-                first_name=ta.first_name,
-            )
-            db.add(user)
-            await db.commit()
-            await db.refresh(user)
+        logger.info("📲 Авторизация Telegram ID: %s", telegram_id)
+
+        # один запрос вместо select -> insert -> refresh; строка переписывается,
+        # только если имя изменилось, xmax = 0 — у только что вставленной
+        columns = (Member.id, Member.telegram_id, Member.username, Member.first_name)
+        stmt = insert(Member).values(
+            telegram_id=telegram_id,
+            username=ta.username,
+            first_name=ta.first_name,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Member.telegram_id],
+            set_={
+                "username": stmt.excluded.username,
+                "first_name": stmt.excluded.first_name,
+            },
+            where=or_(
+                Member.username.is_distinct_from(stmt.excluded.username),
+                Member.first_name.is_distinct_from(stmt.excluded.first_name),
+            ),
+        ).returning(*columns, literal_column("xmax = 0").label("inserted"))
+        user = (await db.execute(stmt)).one_or_none()
+        await db.commit()
+
+        if user is None:
+            # участник уже есть и не менялся — ничего не записано
+            user = (
+                await db.execute(
+                    select(*columns).where(Member.telegram_id == telegram_id)
+                )
+            ).one()
+        elif user.inserted:
+            logger.info("🆕 Новый пользователь: %s", ta.username or ta.first_name)
+        else:
+            invalidate_member(user.id)
 
-        return create_tokens(user.id, user.telegram_id)
+        return create_tokens(user.id, user.telegram_id, user.username, user.first_name)
 
     except Exception as e:
-        logger.error(f"❌ Ошибка авторизации: {e}")
+        logger.error("❌ Ошибка авторизации: %s", e)
         raise HTTPException(status_code=400, detail="Ошибка авторизации")
 
 
@@ -70,24 +90,24 @@ async def refresh_token(
 
     user = await db.get(Member, data["id"])
     if not user:
-        logger.warning(f"❗ Пользователь с ID {data['id']} не найден")
+        logger.warning("❗ Пользователь с ID %s не найден", data["id"])
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
 
-    return create_tokens(user.id, user.telegram_id)
+    return create_tokens(user.id, user.telegram_id, user.username, user.first_name)
 
 
 @router.get("/protected")
-async def protected_route(current: Member = Depends(get_current_member)):
-    logger.info(f"🛡️ Доступ к защищённому маршруту: {current.id}")
+async def protected_route(current: CurrentMember = Depends(get_current_member)):
+    logger.info("🛡️ Доступ к защищённому маршруту: %s", current.id)
     return {"msg": f"Hello, {current.username or current.first_name}!"}
 
 
 @router.get("/member_phone")
 async def get_all_bookings(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_member),
 ):
-    logger.info(f"📞 Запрос телефона участника {current_user.id}")
+    logger.info("📞 Запрос телефона участника %s", current_user.id)
     result = await db.execute(select(Member.phone).where(Member.id == current_user.id))
     phone = result.scalar_one_or_none()
     return phone
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
@@ -6,7 +6,8 @@ from sqlalchemy import select, or_, func, text
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.database import get_db
+from database.database import get_read_db
+from database.catalog_snapshot import catalog_snapshot
 from database.models import (
     Place as PlaceModel,
     AlternateName,
@@ -32,7 +33,7 @@ async def get_places(
     limit: int = Query(5, ge=1, le=100),
     offset: int = Query(0, ge=0),
     similarity_threshold: float = Query(0, ge=0.0, le=1.0),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Возвращает список заведений.
@@ -40,7 +41,14 @@ async def get_places(
     * Если передан `name`, сначала ищем полным-текстовым поиском (FTS),
       а при недостатке результатов – догружаем по trigram-similarity.
     * Дубликаты по `id` всегда убираются.
+    * Без `name` страница отдаётся из общего mmap-снимка каталога (если он
+      собран) — без запросов к БД и сериализации Pydantic.
     """
+    if not name:
+        body = catalog_snapshot.page(offset, limit)
+        if body is not None:
+            return Response(body, media_type="application/json")
+
     stmt_base = select(PlaceModel).options(
         selectinload(PlaceModel.cuisines),
         selectinload(PlaceModel.metro_stations),
@@ -52,13 +60,13 @@ async def get_places(
         selectinload(PlaceModel.menu_links),
         selectinload(PlaceModel.booking_links),
         selectinload(PlaceModel.reviews),
-    )
+    ).where(PlaceModel.is_available.is_(True))
 
     # ------------------------------------------------------------------
     # Поиск по имени
     # ------------------------------------------------------------------
     if name:
-        logger.info(f"🔎 Поиск по имени: '{name}'")
+        logger.info("🔎 Поиск по имени: '%s'", name)
 
         # Приводим к кириллице (simple latin->cyr mapping), затем в lower-case
         processed_name = name.translate(
@@ -78,7 +86,7 @@ async def get_places(
 
         fts_res = await db.execute(stmt_fts.limit(limit))
         places_fts = fts_res.scalars().all()
-        logger.info(f"🔠 Найдено по FTS: {len(places_fts)}")
+        logger.info("🔠 Найдено по FTS: %s", len(places_fts))
 
         # ---------- similarity ----------
         if len(places_fts) < limit // 2:
@@ -89,12 +97,13 @@ async def get_places(
                     > similarity_threshold,
                     PlaceModel.id.notin_(ids_fts),  # убираем дубли на уровне SQL
                 )
-                .order_by(func.similarity(PlaceModel.search_text, name).desc())
+                # <-> = 1 - similarity: тот же порядок, но KNN по GiST-индексу
+                .order_by(PlaceModel.search_text.op("<->")(name))
                 .limit(limit)
             )
             sim_res = await db.execute(stmt_sim)
             places_similar = sim_res.scalars().all()
-            logger.info(f"🧩 Найдено по similarity: {len(places_similar)}")
+            logger.info("🧩 Найдено по similarity: %s", len(places_similar))
 
             combined = places_fts + places_similar
         else:
@@ -116,5 +125,5 @@ async def get_places(
     stmt_default = stmt_base.order_by(PlaceModel.full_name).offset(offset).limit(limit)
     result = await db.execute(stmt_default)
     rows = result.scalars().all()
-    logger.info(f"📄 Всего заведений без фильтрации: {len(rows)}")
+    logger.info("📄 Всего заведений без фильтрации: %s", len(rows))
     return rows
@@ -0,0 +1,28 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from config import PROFILE_DIR
+from api.utils.profiler import PROFILE_NAME_RE, list_profiles, token_is_valid
+
+router = APIRouter()
+
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    if not token_is_valid(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+
+@router.get("/debug/profiles", dependencies=[Depends(require_profile_token)])
+async def get_profiles():
+    return list_profiles()
+
+
+@router.get("/debug/profiles/{name}", dependencies=[Depends(require_profile_token)])
+async def download_profile(name: str):
+    path = os.path.join(PROFILE_DIR, name)
+    if not PROFILE_NAME_RE.match(name) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
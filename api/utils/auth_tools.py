@@ -1,26 +1,44 @@
 import jwt
 import json
+import uuid
 import hmac
 import hashlib
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, NamedTuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
-from urllib.parse import unquote, parse_qs, parse_qsl
+from urllib.parse import parse_qsl
 
 from database.database import get_db
 from database.models import Member
+from api.utils.cache import TTLCache
 from config import (
     JWT_SECRET_KEY,
     JWT_ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
+    MEMBER_CACHE_SIZE,
+    MEMBER_CACHE_TTL,
+    AUTH_TRUST_TOKEN_CLAIMS,
+    INIT_DATA_CACHE_SIZE,
+    INIT_DATA_CACHE_TTL,
     telegram_token,
 )
 
 bearer_scheme = HTTPBearer()
 
+# id участника -> CurrentMember
+member_cache = TTLCache(maxsize=MEMBER_CACHE_SIZE, ttl=MEMBER_CACHE_TTL)
+# init_data -> разобранные и проверенные данные
+verified_init_data = TTLCache(maxsize=INIT_DATA_CACHE_SIZE, ttl=INIT_DATA_CACHE_TTL)
+
+# Секреты зависят только от токена бота — считаем их один раз
+_bot_token = (telegram_token or "").encode()
+LOGIN_WIDGET_SECRET = hashlib.sha256(_bot_token).digest()
+WEB_APP_SECRET = hmac.new(b"WebAppData", _bot_token, hashlib.sha256).digest()
+
 
 def verify_telegram_auth(data: dict) -> bool:
     hash_from_telegram = data.pop("hash", None)
@@ -29,57 +47,55 @@ def verify_telegram_auth(data: dict) -> bool:
 
     data_check_string = "\n".join(f"{k}={v}" for k, v in sorted(data.items()))
 
-    secret_key = hashlib.sha256(telegram_token.encode()).digest()
     computed_hash = hmac.new(
-        secret_key, data_check_string.encode(), hashlib.sha256
+        LOGIN_WIDGET_SECRET, data_check_string.encode(), hashlib.sha256
     ).hexdigest()
-    return computed_hash == hash_from_telegram
-
-
-def validate_web_app_data(init_data):
-    parsed_data = parse_qs(init_data)
-    hash_str = parsed_data.get("hash", [""])[0]
-    init_data = sorted(
-        [
-            chunk.split("=")
-            for chunk in unquote(init_data).split("&")
-            if chunk[: len("hash=")] != "hash="
-        ],
-        key=lambda x: x[0],
-    )
-    init_data = "\n".join([f"{rec[0]}={rec[1]}" for rec in init_data])
-
-    secret_key = hmac.new(
-        "WebAppData".encode(), telegram_token.encode(), hashlib.sha256
-    ).digest()
-    data_check = hmac.new(secret_key, init_data.encode(), hashlib.sha256)
-
-    print(data_check.hexdigest(), hash_str)
-    if data_check.hexdigest() != hash_str:
-        raise Exception("Данные переданы не из Telegram")
+    return hmac.compare_digest(computed_hash, hash_from_telegram)
 
-    return init_data
 
+def validate_web_app_data(init_data: str) -> dict:
+    """
+    Проверяет подпись init_data Telegram Mini App за один проход разбора
+    и возвращает данные (поле user уже раскодировано из JSON).
+    """
+    cached = verified_init_data.get(init_data)
+    if cached is not None:
+        return cached
 
-def parse_validate_raw(raw_str: str) -> dict:
     data = {}
-    for line in raw_str.splitlines():
-        if not line or "=" not in line:
-            continue
-        key, val = line.split("=", 1)
-        if key == "user":
-            data[key] = json.loads(val)
+    hash_str = ""
+    for key, value in parse_qsl(init_data, keep_blank_values=True):
+        if key == "hash":
+            hash_str = value
         else:
-            data[key] = val
+            data[key] = value
+
+    data_check = "\n".join(f"{key}={data[key]}" for key in sorted(data))
+    computed_hash = hmac.new(
+        WEB_APP_SECRET, data_check.encode(), hashlib.sha256
+    ).hexdigest()
+    if not hash_str or not hmac.compare_digest(computed_hash, hash_str):
+        raise Exception("Данные переданы не из Telegram")
+
+    if "user" in data:
+        data["user"] = json.loads(data["user"])
+    verified_init_data.set(init_data, data)
     return data
 
 
-def create_tokens(member_id: int, telegram_id: int) -> Dict[str, str]:
+def create_tokens(
+    member_id: int,
+    telegram_id: int,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None,
+) -> Dict[str, str]:
     now = datetime.utcnow()
     member_id = str(member_id)
     access_payload = {
         "id": member_id,
         "telegram_id": telegram_id,
+        "username": username,
+        "first_name": first_name,
         "iat": now,
         "exp": now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     }
@@ -101,14 +117,55 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+class CurrentMember(NamedTuple):
+    """
+    Участник запроса: только поля, которые есть и в claims access-токена, и в
+    кэше. Не ORM-объект — его нельзя добавить в сессию или отдать как Member;
+    телефон, права и связи обработчик читает из БД по id.
+    """
+
+    id: uuid.UUID
+    telegram_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+
+
+def invalidate_member(member_id) -> None:
+    member_cache.invalidate(str(member_id))
+
+
+@event.listens_for(Member, "after_update")
+@event.listens_for(Member, "after_delete")
+def _invalidate_member_on_change(mapper, connection, target):
+    invalidate_member(target.id)
+
+
 async def get_current_member(
     creds: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     db: AsyncSession = Depends(get_db),
-) -> Member:
+) -> CurrentMember:
     data = decode_token(creds.credentials)
     if not data:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid or expired token")
-    user = await db.get(Member, data["id"])
-    if not user:
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
-    return user
+
+    if AUTH_TRUST_TOKEN_CLAIMS and "telegram_id" in data:
+        # данные на момент выдачи токена: удалённый или переименованный
+        # участник виден таким до истечения access-токена
+        return CurrentMember(
+            id=uuid.UUID(data["id"]),
+            telegram_id=data["telegram_id"],
+            username=data.get("username"),
+            first_name=data.get("first_name"),
+        )
+
+    # сессия не берёт соединение из пула, пока к ней не обратились
+    member = member_cache.get(data["id"])
+    if member is None:
+        user = await db.get(Member, data["id"])
+        if not user:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
+        member = CurrentMember(
+            user.id, user.telegram_id, user.username, user.first_name
+        )
+        member_cache.set(data["id"], member)
+    return member
@@ -1,10 +1,150 @@
-import logging
+import os
 import sys
+import copy
+import json
+import uuid
+import queue
+import random
+import atexit
+import logging
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from config import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_RATE, LOG_QUEUE_SIZE
+
+# id текущего HTTP-запроса и решение о выборке его INFO/DEBUG-записей;
+# выставляются RequestIdMiddleware, вне запросов (Celery, скрипты) — по умолчанию
+request_id_var: ContextVar = ContextVar("request_id", default=None)
+log_sampled_var: ContextVar = ContextVar("log_sampled", default=True)
+
+
+class RequestContextFilter(logging.Filter):
+    """Проставляет request_id и отбрасывает подробные записи невыбранных запросов."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return record.levelno >= logging.WARNING or log_sampled_var.get()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler, не блокирующий вызывающий поток: при переполненной очереди
+    запись отбрасывается и считается в dropped.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # аргументы подставляются сразу (объекты могут измениться до записи),
+        # а форматирование в JSON/текст — уже в потоке записи
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _stream_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        )
+    return handler
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
-)
+
+queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+queue_handler.addFilter(RequestContextFilter())
+_listener = None
+
+
+def _start_listener() -> None:
+    """Поток записи в stdout; после fork (prefork Celery) запускается заново."""
+    global _listener
+    queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    # счётчик — по процессу (метка pid в /metrics), с родителя не наследуется
+    queue_handler.dropped = 0
+    _listener = QueueListener(queue_handler.queue, _stream_handler())
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+_start_listener()
+os.register_at_fork(after_in_child=_start_listener)
+atexit.register(_stop_listener)
+
+logging.basicConfig(level=LOG_LEVEL, handlers=[queue_handler])
 
 logger = logging.getLogger("backend")
+
+
+class RequestIdMiddleware:
+    """
+    ASGI-middleware: request_id из заголовка X-Request-ID (или новый) для всех
+    записей лога запроса, тот же id — в ответе. INFO/DEBUG-записи пишутся для
+    доли LOG_SAMPLE_RATE запросов; предупреждения и ошибки — для всех.
+    """
+
+    def __init__(self, app, sample_rate: float = LOG_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", []):
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        id_token = request_id_var.set(request_id)
+        sampled_token = log_sampled_var.set(random.random() < self.sample_rate)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            log_sampled_var.reset(sampled_token)
+            request_id_var.reset(id_token)
@@ -0,0 +1,272 @@
+import os
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Iterable
+
+from api.utils.logger import queue_handler
+
+# Границы по умолчанию (секунды) — от быстрых запросов к БД до медленных HTTP
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (накопительные счётчики)."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self.sum, self.count
+        cumulative, running = {}, 0
+        for le, c in zip(self.buckets, counts):
+            running += c
+            cumulative[str(le)] = running
+        cumulative["+Inf"] = count
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge(Counter):
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+# ---------- экспорт в формате Prometheus ---------------------------------- #
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def process_labels() -> dict:
+    """
+    У каждого воркера uvicorn свой реестр, а /metrics отвечает тот воркер,
+    которому достался запрос. Метка pid разводит серии разных процессов:
+    Prometheus суммирует их через sum without (pid).
+    """
+    return {"pid": os.getpid()}
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Family:
+    """Метрика с набором меток: labels(...) возвращает (и создаёт) серию."""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames=(), factory=None):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._series: dict[tuple, object] = {}
+        self._lock = Lock()
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, self._factory())
+        return series
+
+    def samples(self):
+        for values, series in list(self._series.items()):
+            yield dict(zip(self.labelnames, values)), series
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        process = process_labels()
+        for labels, series in self.samples():
+            lines.extend(
+                render_series(self.name, self.kind, {**process, **labels}, series)
+            )
+        return lines
+
+
+def render_series(name: str, kind: str, labels: dict, series) -> list[str]:
+    if kind != "histogram":
+        return [f"{name}{format_labels(labels)} {_format_value(series.value)}"]
+    snapshot = series.snapshot()
+    lines = [
+        f"{name}_bucket{format_labels({**labels, 'le': le})} {count}"
+        for le, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{format_labels(labels)} {snapshot['sum']!r}")
+    lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class Registry:
+    """
+    Метрики процесса в текстовом формате Prometheus (GET /metrics), каждая
+    серия с меткой pid (см. process_labels).
+
+    Серии меняются под своими Lock без общего состояния, так что запись метрики
+    на горячем пути — поиск в dict и сложение. Значения, которые дешевле
+    прочитать при экспорте (состояние пула), отдают коллекторы.
+    """
+
+    def __init__(self):
+        self._families: dict[str, Family] = {}
+        self._collectors: list[Callable[[], Iterable[str]]] = []
+
+    def _family(self, name, help, kind, labelnames, factory) -> Family:
+        if name not in self._families:
+            self._families[name] = Family(name, help, kind, labelnames, factory)
+        return self._families[name]
+
+    def counter(self, name: str, help: str, labelnames=()) -> Family:
+        return self._family(name, help, "counter", labelnames, Counter)
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Family:
+        return self._family(name, help, "gauge", labelnames, Gauge)
+
+    def histogram(
+        self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Family:
+        return self._family(
+            name, help, "histogram", labelnames, lambda: Histogram(buckets)
+        )
+
+    def collector(self, collect: Callable[[], Iterable[str]]):
+        """Функция, возвращающая готовые строки метрик на момент экспорта."""
+        self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines = []
+        for family in self._families.values():
+            lines.extend(family.render())
+        for collect in self._collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ---------- метрики приложения -------------------------------------------- #
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total",
+    "HTTP-запросы по маршруту и коду ответа",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP-запросы в обработке", ("method",)
+)
+DB_QUERIES = registry.counter(
+    "db_queries_total", "Запросы к БД", ("db", "operation", "outcome")
+)
+DB_LATENCY = registry.histogram(
+    "db_query_duration_seconds",
+    "Время выполнения запроса к БД",
+    ("db", "operation"),
+)
+QUEUE_PUBLISH_LATENCY = registry.histogram(
+    "queue_publish_duration_seconds",
+    "Публикация брони в RabbitMQ",
+    ("queue", "outcome"),
+)
+TELEGRAM_SEND_LATENCY = registry.histogram(
+    "telegram_send_duration_seconds",
+    "Отправка сообщения в Telegram Bot API",
+    ("outcome",),
+)
+
+
+@registry.collector
+def log_metric_lines() -> list[str]:
+    """Записи лога, отброшенные при переполненной очереди (LOG_QUEUE_SIZE)."""
+    name = "log_records_dropped_total"
+    return [
+        f"# HELP {name} Записи лога, отброшенные из-за переполненной очереди",
+        f"# TYPE {name} counter",
+        f"{name}{format_labels(process_labels())} {queue_handler.dropped}",
+    ]
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: задержка, код ответа и запросы в обработке по маршруту.
+    Метка route — шаблон пути (/api/places/{place_id}), его проставляет роутер
+    в scope, так что число серий не растёт с числом id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
@@ -0,0 +1,166 @@
+import os
+import re
+import sys
+import hmac
+import time
+import random
+import threading
+from datetime import datetime
+from typing import Optional
+
+from config import (
+    PROFILE_TOKEN,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_KEEP,
+)
+from api.utils.logger import logger
+
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_NAME_RE = re.compile(r"^[\w.-]+\.folded$")
+
+
+def token_is_valid(token: Optional[str]) -> bool:
+    # compare_digest на str с не-ASCII символами бросает TypeError — сравниваем байты
+    return bool(PROFILE_TOKEN and token) and hmac.compare_digest(
+        token.encode("utf-8", "surrogateescape"), PROFILE_TOKEN.encode()
+    )
+
+
+class Sampler:
+    """
+    Статистический профайлер: фоновый поток раз в interval снимает стек потока
+    thread_id через sys._current_frames(). Накладные расходы — только пока идёт
+    профилирование и пропорциональны частоте выборки, а не числу вызовов.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: dict[str, int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                    f":{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Формат folded stacks (flamegraph.pl, speedscope, inferno)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+def save_profile(name: str, sampler: Sampler, profile_dir: str = PROFILE_DIR) -> None:
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, name)
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        f.write(sampler.folded())
+    os.replace(path + ".part", path)
+    # храним только последние PROFILE_KEEP профилей
+    for old in list_profiles(profile_dir)[PROFILE_KEEP:]:
+        os.remove(os.path.join(profile_dir, old["name"]))
+
+
+def list_profiles(profile_dir: str = PROFILE_DIR) -> list[dict]:
+    """Профили, от новых к старым."""
+    if not os.path.isdir(profile_dir):
+        return []
+    profiles = []
+    for name in os.listdir(profile_dir):
+        if not PROFILE_NAME_RE.match(name):
+            continue
+        stat = os.stat(os.path.join(profile_dir, name))
+        profiles.append(
+            {
+                "name": name,
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            }
+        )
+    return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+
+class ProfilerMiddleware:
+    """
+    ASGI-middleware: профилирует запросы с заголовком X-Profile-Token (равным
+    PROFILE_TOKEN) и случайную долю PROFILE_SAMPLE_RATE остальных. Выборка
+    идёт по потоку event loop, поэтому одновременно профилируется один запрос;
+    стеки параллельных корутин в профиль тоже попадают. Имя файла профиля
+    возвращается в заголовке X-Profile-Id.
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+        self._busy = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        for key, value in scope.get("headers", []):
+            if key == PROFILE_HEADER:
+                return token_is_valid(value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (
+            self._requested(scope) or random.random() < self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        slug = re.sub(r"[^\w]+", "_", scope["path"]).strip("_") or "root"
+        name = (
+            f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-"
+            f"{scope['method'].lower()}-{slug[:60]}.folded"
+        )
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            with Sampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000) as sampler:
+                await self.app(scope, receive, send_with_id)
+        finally:
+            self._busy.release()
+        try:
+            save_profile(name, sampler)
+            logger.info(
+                "🔥 Профиль %s %s: %d выборок за %.3f сек -> %s",
+                scope["method"],
+                scope["path"],
+                sampler.samples,
+                time.perf_counter() - started,
+                name,
+            )
+        except OSError as e:
+            logger.warning("⚠️ Не удалось сохранить профиль %s: %s", name, e)
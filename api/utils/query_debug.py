@@ -0,0 +1,43 @@
+from config import QUERY_REPEAT_THRESHOLD
+from database.query_metrics import track_queries, stop_tracking
+from api.utils.logger import logger
+
+
+class QueryDebugMiddleware:
+    """
+    ASGI-middleware для dev/staging (QUERY_DEBUG): число запросов к БД и их
+    суммарное время в заголовках ответа X-DB-Query-Count / X-DB-Time-Ms, а
+    запросы одной формы, повторённые QUERY_REPEAT_THRESHOLD раз и больше, —
+    в лог как вероятный N+1.
+    """
+
+    def __init__(self, app, repeat_threshold: int = QUERY_REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = track_queries()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append(
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode())
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            stop_tracking(token)
+            for shape, times in stats.repeated(self.repeat_threshold).items():
+                logger.warning(
+                    f"🔁 Возможный N+1 в {scope['method']} {scope['path']}: "
+                    f"{times} одинаковых запросов: {shape[:500]}"
+                )
@@ -0,0 +1,154 @@
+"""
+Замер старта процессов API и Celery-воркера.
+
+    python bench_startup.py                          # замер
+    python bench_startup.py --report startup.json    # сохранить как baseline
+    python bench_startup.py --baseline startup.json  # код выхода 1 при регрессии
+
+Для каждой роли в отдельном интерпретаторе замеряются время импорта модуля
+(main / tasks), время до первого ответа API (GET / через ASGI, без lifespan и БД)
+и полное время процесса. Тяжёлые модули, не нужные роли на старте (стек
+краулера, aio_pika), не должны оказаться загруженными — иначе код выхода 1.
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+from statistics import median
+from typing import Optional
+
+from api.utils.logger import logger
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CRAWLER_STACK = (
+    "bs4",
+    "lxml",
+    "selenium",
+    "database.crawler",
+    "database.restaurant_parser",
+    "database.discovery",
+    "database.import_data",
+)
+ROLES = {
+    "api": {"module": "main", "forbidden": CRAWLER_STACK + ("aio_pika",)},
+    "worker": {"module": "tasks", "forbidden": CRAWLER_STACK},
+}
+METRICS = ("import_s", "first_request_s", "process_s")
+
+# выполняется в чистом интерпретаторе: python -c PROBE <module> <forbidden,...>
+PROBE = """
+import sys, time, json, asyncio
+started = time.perf_counter()
+module = __import__(sys.argv[1])
+imported = time.perf_counter()
+first_request = None
+app = getattr(module, "app", None)
+if app is not None:
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+             "method": "GET", "scheme": "http", "path": "/", "raw_path": b"/",
+             "root_path": "", "query_string": b"", "headers": [],
+             "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000)}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message["status"]
+    asyncio.run(app(scope, receive, send))
+    first_request = time.perf_counter() - started
+print("\\nSTARTUP " + json.dumps({
+    "import_s": imported - started,
+    "first_request_s": first_request,
+    "modules": len(sys.modules),
+    "loaded": [m for m in sys.argv[2].split(",") if m in sys.modules],
+}))
+"""
+
+
+def probe(role: str) -> dict:
+    spec = ROLES[role]
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, spec["module"], ",".join(spec["forbidden"])],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{role}: {result.stderr.strip().splitlines()[-1:]}")
+    # логи пишутся фоновым потоком и могут оказаться после результата
+    line = next(
+        line for line in result.stdout.splitlines() if line.startswith("STARTUP ")
+    )
+    sample = json.loads(line[len("STARTUP ") :])
+    sample["process_s"] = elapsed
+    return sample
+
+
+def measure(repeat: int) -> dict:
+    report = {}
+    for role in ROLES:
+        samples = [probe(role) for _ in range(repeat)]
+        stats = {
+            metric: round(median(s[metric] for s in samples), 4)
+            for metric in METRICS
+            if samples[0][metric] is not None
+        }
+        stats["modules"] = samples[0]["modules"]
+        stats["loaded"] = samples[0]["loaded"]
+        report[role] = stats
+        logger.info(
+            f"🚀 {role:<6} импорт {stats['import_s']:.3f} сек, "
+            f"процесс {stats['process_s']:.3f} сек"
+            + (
+                f", первый ответ {stats['first_request_s']:.3f} сек"
+                if "first_request_s" in stats
+                else ""
+            )
+            + f", модулей {stats['modules']}"
+        )
+    return report
+
+
+def check(report: dict, baseline_path: Optional[str], tolerance: float) -> int:
+    failed = 0
+    for role, stats in report.items():
+        if stats["loaded"]:
+            logger.error(f"❌ {role}: на старте загружены {', '.join(stats['loaded'])}")
+            failed = 1
+    if not baseline_path:
+        return failed
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    for role, stats in report.items():
+        for metric in METRICS:
+            current, expected = stats.get(metric), baseline.get(role, {}).get(metric)
+            if current is None or not expected:
+                continue
+            if current > expected * (1 + tolerance):
+                logger.error(
+                    f"❌ {role}.{metric}: {current:.3f} сек против {expected:.3f} сек"
+                )
+                failed = 1
+    if not failed:
+        logger.info(f"✅ Старт не медленнее baseline {baseline_path}")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер старта API и воркера")
+    parser.add_argument("--repeat", type=int, default=5, help="запусков на роль")
+    parser.add_argument("--report", help="записать замер в JSON-файл")
+    parser.add_argument("--baseline", help="замер для сравнения")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="допустимое замедление (доля)"
+    )
+    args = parser.parse_args()
+
+    report = measure(args.repeat)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    sys.exit(check(report, args.baseline, args.tolerance))
@@ -6,6 +6,22 @@ load_dotenv()
 
 # FastAPI / Uvicorn
 uvicorn_host = os.getenv("UVICORN_HOST")
+# процессов uvicorn (то же имя читает CLI uvicorn --workers)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# общий для воркеров mmap-снимок каталога, пустое значение — выдача из БД
+CATALOG_SNAPSHOT_PATH = os.getenv(
+    "CATALOG_SNAPSHOT_PATH", "database/catalog_snapshot.bin"
+)
+# как часто воркер проверяет, не вышла ли новая версия каталога (сек)
+CATALOG_SNAPSHOT_REFRESH = float(os.getenv("CATALOG_SNAPSHOT_REFRESH", "30"))
+
+# Логи: json — по объекту на строку с request_id, text — прежний формат
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# доля HTTP-запросов, чьи INFO/DEBUG-записи пишутся (WARNING и выше — всегда)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+# записи сверх очереди отбрасываются, а не блокируют event loop
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 
 # Postgres
 postgres_user = os.getenv("POSTGRES_USER")
@@ -14,9 +30,42 @@ postgres_host = os.getenv("POSTGRES_HOST")
 postgres_port = os.getenv("PG_PORT")
 postgres_db = os.getenv("POSTGRES_DB")
 
+# Реплика только для чтения (необязательна)
+postgres_replica_host = os.getenv("POSTGRES_REPLICA_HOST")
+postgres_replica_port = os.getenv("POSTGRES_REPLICA_PORT", postgres_port)
+# при отставании больше порога читающие запросы уходят на primary
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "5"))
+
+# Пул соединений / asyncpg
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# 0 — отключить кэш подготовленных выражений (нужно за pgbouncer в transaction mode)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# серверный statement_timeout в мс, 0 — без ограничения
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# dev/staging: учёт запросов на HTTP-запрос (заголовки X-DB-*), лог медленных
+# запросов с параметрами и поиск N+1 — одинаковых запросов в одном HTTP-запросе
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", "false").lower() in ("1", "true", "yes")
+QUERY_SLOW_MS = float(os.getenv("QUERY_SLOW_MS", "100"))
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+# Профилирование запросов: по заголовку X-Profile-Token и/или доле запросов
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
 # Telegram
 telegram_token = os.getenv("BOT_TOKEN")
 telegram_login = os.getenv("TELEGRAM_LOGIN")
+# уже проверенные init_data Mini App (всплески логинов при запуске)
+INIT_DATA_CACHE_SIZE = int(os.getenv("INIT_DATA_CACHE_SIZE", "10000"))
+INIT_DATA_CACHE_TTL = float(os.getenv("INIT_DATA_CACHE_TTL", "300"))
 
 # JWT
 JWT_SECRET_KEY = os.getenv("JWT_SECRET", "some-exmpl-key")
@@ -24,6 +73,16 @@ JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Member cache (get_current_member)
+MEMBER_CACHE_SIZE = int(os.getenv("MEMBER_CACHE_SIZE", "10000"))
+MEMBER_CACHE_TTL = float(os.getenv("MEMBER_CACHE_TTL", "60"))
+# доверять подписанным claims access-токена и не ходить в БД вовсе
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
 # RabbitMQ
 RABBITMQ_HOST = os.getenv("RABBITMQ_HOST")
 RABBITMQ_PORT = os.getenv("RABBITMQ_PORT", "5672")
@@ -37,6 +96,48 @@ rabbitmq_url = (
     f"amqp://{USERNAME_QUEUE}:{PASSWORD_QUEUE}" f"@{RABBITMQ_HOST}:{RABBITMQ_PORT}/"
 )
 
+# LLM (нормализация названий при импорте)
+GROQ_TOKEN = os.getenv("GROQ_TOKEN")
+GROQ_API_URL = os.getenv(
+    "GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions"
+)
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama3-70b-8192")
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+
+# Краулер страниц ресторанов
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "16"))
+# запросов в секунду на один хост, 0 — без ограничения
+CRAWL_RATE_PER_HOST = float(os.getenv("CRAWL_RATE_PER_HOST", "5"))
+CRAWL_MAX_RETRIES = int(os.getenv("CRAWL_MAX_RETRIES", "3"))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "15"))
+# кэш страниц с ETag/Last-Modified, пустая строка — отключить
+CRAWL_CACHE_DIR = os.getenv("CRAWL_CACHE_DIR", "database/page_cache")
+# сбор ссылок: auto | sitemap | listing | selenium
+CRAWL_DISCOVERY = os.getenv("CRAWL_DISCOVERY", "auto")
+CRAWL_SITEMAP_URL = os.getenv("CRAWL_SITEMAP_URL", "https://leclick.ru/sitemap.xml")
+CRAWL_LISTING_URL = os.getenv(
+    "CRAWL_LISTING_URL", "https://leclick.ru/restaurants/index?page={page}"
+)
+CRAWL_LISTING_MAX_PAGES = int(os.getenv("CRAWL_LISTING_MAX_PAGES", "500"))
+# движок, нашедший меньше этой доли доступных заведений, считается упавшим
+CRAWL_DISCOVERY_MIN_SHARE = float(os.getenv("CRAWL_DISCOVERY_MIN_SHARE", "0.5"))
+SELENIUM_URL = os.getenv("SELENIUM_URL", "http://selenium:4444/wd/hub")
+# ссылок в одной задаче crawl+import конвейера обновления каталога
+CATALOG_CHUNK_SIZE = int(os.getenv("CATALOG_CHUNK_SIZE", "50"))
+# состояние обхода (SQLite) для продолжения после сбоя
+CRAWL_STATE_FILE = os.getenv("CRAWL_STATE_FILE", "database/crawl_state.sqlite3")
+# процессов для разбора страниц, 0 — разбирать в event loop
+CRAWL_PARSE_WORKERS = int(os.getenv("CRAWL_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
 # booking states
 booking_success_state = os.getenv("BOOKING_SUCCESS_STATE")
 booking_failure_state = os.getenv("BOOKING_FAILURE_STATE")
+
+# Bookings partitioning
+BOOKING_PARTITIONS_AHEAD = int(os.getenv("BOOKING_PARTITIONS_AHEAD", "3"))
+BOOKING_ARCHIVE_AFTER_MONTHS = int(os.getenv("BOOKING_ARCHIVE_AFTER_MONTHS", "12"))
+BOOKING_ARCHIVE_SCHEMA = os.getenv("BOOKING_ARCHIVE_SCHEMA", "bookings_archive")
+BOOKING_ARCHIVE_TABLESPACE = os.getenv("BOOKING_ARCHIVE_TABLESPACE")
+BOOKINGS_HISTORY_DAYS = int(os.getenv("BOOKINGS_HISTORY_DAYS", "365"))
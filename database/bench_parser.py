@@ -0,0 +1,215 @@
+"""
+Бенчмарк и проверка паритета RestaurantParser на сохранённых страницах.
+
+    python -m database.bench_parser --from-cache database/page_cache  # собрать фикстуры
+    python -m database.bench_parser --record --rev 1b6ba9d^  # эталоны старым парсером
+    python -m database.bench_parser               # сравнить и замерить
+
+Фикстура — пара <name>.html и <name>.json ({"url": ..., "record": ...}).
+Эталоны в database/fixtures/pages записаны RestaurantParser до однопроходной
+версии: --record берёт парсер из указанной ревизии git и пишет эталоны только
+новым страницам, иначе текущий парсер сравнивался бы сам с собой.
+Каждая страница разбирается всеми доступными бэкендами BeautifulSoup, результат
+сравнивается с эталоном; затем замеряется пропускная способность пула процессов.
+Код выхода 1 при любом расхождении с эталоном.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import time
+import types
+import argparse
+import subprocess
+from urllib.parse import urlparse
+from importlib.util import find_spec
+from concurrent.futures import ProcessPoolExecutor
+
+from database.page_cache import PageCache, MISSING
+from database.restaurant_parser import DEFAULT_BACKEND, parse_page
+from api.utils.logger import logger
+
+FIXTURES_DIR = "database/fixtures/pages"
+BACKENDS = [b for b in ("html.parser", "lxml") if b == "html.parser" or find_spec(b)]
+
+
+def load_fixtures(fixtures_dir: str) -> list[tuple[str, str, str]]:
+    """[(name, url, html)]; url есть только у фикстур с эталоном."""
+    if not os.path.isdir(fixtures_dir):
+        return []
+    fixtures = []
+    for name in sorted(os.listdir(fixtures_dir)):
+        if not name.endswith(".html"):
+            continue
+        stem = name[: -len(".html")]
+        with open(os.path.join(fixtures_dir, name), encoding="utf-8") as f:
+            html = f.read()
+        golden_path = os.path.join(fixtures_dir, stem + ".json")
+        url = None
+        if os.path.exists(golden_path):
+            with open(golden_path, encoding="utf-8") as f:
+                url = json.load(f)["url"]
+        fixtures.append((stem, url, html))
+    return fixtures
+
+
+def import_from_cache(cache_dir: str, fixtures_dir: str) -> int:
+    """Копирует страницы из кэша краулера; эталоном служит закэшированный разбор."""
+    meta_dir = os.path.join(cache_dir, "meta")
+    if not os.path.isdir(meta_dir):
+        logger.error(f"❌ В {cache_dir} нет кэша страниц")
+        return 0
+    cache = PageCache(cache_dir)
+    os.makedirs(fixtures_dir, exist_ok=True)
+    copied = 0
+    for name in sorted(os.listdir(meta_dir)):
+        with open(os.path.join(meta_dir, name)) as f:
+            meta = json.load(f)
+        body = cache.load_page(meta["sha256"])
+        if body is None:
+            continue
+        stem = meta["sha256"][:16]
+        html_path = os.path.join(fixtures_dir, stem + ".html")
+        with open(html_path, "w", encoding="utf-8") as f:
+            f.write(body.decode(meta["encoding"], errors="replace"))
+        copied += 1
+        record = cache.load_record(meta["url"], meta["sha256"])
+        if record is MISSING:
+            continue
+        write_golden(fixtures_dir, stem, meta["url"], record)
+    logger.info(f"📄 Скопировано страниц: {copied} -> {fixtures_dir}")
+    return copied
+
+
+def write_golden(fixtures_dir: str, stem: str, url: str, record) -> None:
+    with open(os.path.join(fixtures_dir, stem + ".json"), "w", encoding="utf-8") as f:
+        json.dump({"url": url, "record": record}, f, ensure_ascii=False, indent=1)
+
+
+def reference_parser(rev: str):
+    """database/restaurant_parser.py из ревизии git как отдельный модуль."""
+    path = "database/restaurant_parser.py"
+    source = subprocess.run(
+        ["git", "show", f"{rev}:{path}"], capture_output=True, text=True, check=True
+    ).stdout
+    module = types.ModuleType("reference_restaurant_parser")
+    exec(compile(source, f"{rev}:{path}", "exec"), module.__dict__)
+    return module
+
+
+def reference_parse(module, html: str, url: str):
+    if hasattr(module, "parse_page"):
+        return module.parse_page(html, url)
+    # до однопроходной версии source добавлял краулер
+    data = module.RestaurantParser(html, url).parse()
+    if data is not None:
+        data["source"] = {"url": url, "domain": urlparse(url).netloc}
+    return data
+
+
+def record_goldens(fixtures_dir: str, default_url: str, rev: str) -> int:
+    """Эталоны парсером из ревизии rev для фикстур, у которых их ещё нет."""
+    module = reference_parser(rev)
+    recorded = 0
+    for stem, url, html in load_fixtures(fixtures_dir):
+        if url is not None:
+            continue
+        write_golden(
+            fixtures_dir, stem, default_url, reference_parse(module, html, default_url)
+        )
+        recorded += 1
+    logger.info(f"📌 Эталонов записано парсером из {rev}: {recorded} -> {fixtures_dir}")
+    return recorded
+
+
+def normalized(record):
+    """Старый парсер отдавал alternate_name в порядке обхода set."""
+    if record:
+        record = dict(record, alternate_name=sorted(record["alternate_name"]))
+    return record
+
+
+def _parse_all(args):
+    backend, pages = args
+    return [parse_page(html, url, backend) for url, html in pages]
+
+
+def bench(fixtures_dir: str, repeat: int, workers: int) -> int:
+    fixtures = [f for f in load_fixtures(fixtures_dir) if f[1]]
+    if not fixtures:
+        logger.error(f"❌ Нет фикстур с эталоном в {fixtures_dir} (см. --record)")
+        return 1
+
+    goldens = {}
+    for stem, _, _ in fixtures:
+        with open(os.path.join(fixtures_dir, stem + ".json"), encoding="utf-8") as f:
+            goldens[stem] = json.load(f)["record"]
+
+    mismatches = 0
+    for backend in BACKENDS:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            results = [parse_page(html, url, backend) for _, url, html in fixtures]
+        elapsed = (time.perf_counter() - started) / repeat
+        for (stem, _, _), result in zip(fixtures, results):
+            if normalized(result) != normalized(goldens[stem]):
+                mismatches += 1
+                diff = sorted(
+                    key
+                    for key in set(result or {}) | set(goldens[stem] or {})
+                    if (result or {}).get(key) != (goldens[stem] or {}).get(key)
+                )
+                logger.error(f"❌ {backend}: {stem} расходится с эталоном: {diff}")
+        logger.info(
+            f"⏱️ {backend:<12} {elapsed / len(fixtures) * 1000:8.2f} мс/стр "
+            f"({len(fixtures) / elapsed:.1f} стр/сек, 1 процесс)"
+        )
+
+    if workers > 1:
+        pages = [(url, html) for _, url, html in fixtures] * repeat
+        chunks = [pages[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(workers) as pool:
+            started = time.perf_counter()
+            list(pool.map(_parse_all, [(DEFAULT_BACKEND, chunk) for chunk in chunks]))
+            elapsed = time.perf_counter() - started
+        logger.info(
+            f"⏱️ {DEFAULT_BACKEND:<12} {len(pages) / elapsed:.1f} стр/сек "
+            f"({workers} процессов)"
+        )
+
+    if mismatches:
+        logger.error(f"❌ Расхождений с эталоном: {mismatches}")
+        return 1
+    logger.info(f"✅ Паритет с эталоном: {len(fixtures)} страниц, {', '.join(BACKENDS)}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--from-cache", help="каталог кэша краулера (CRAWL_CACHE_DIR)")
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="записать недостающие эталоны парсером из ревизии --rev",
+    )
+    parser.add_argument("--rev", help="ревизия git с эталонным RestaurantParser")
+    parser.add_argument(
+        "--url",
+        default="https://leclick.ru/restaurant/fixture",
+        help="URL для фикстур без эталона",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.from_cache:
+        import_from_cache(args.from_cache, args.fixtures)
+    elif args.record:
+        if not args.rev:
+            parser.error("--record требует --rev: эталон пишет не текущий парсер")
+        record_goldens(args.fixtures, args.url, args.rev)
+    else:
+        sys.exit(bench(args.fixtures, args.repeat, args.workers))
@@ -0,0 +1,241 @@
+"""
+Снимок каталога для выдачи /api/places без поиска.
+
+    python -m database.catalog_snapshot [--path database/catalog_snapshot.bin]
+
+Снимок — файл, который все процессы uvicorn отображают в память (mmap) только
+на чтение: страницы делит page cache ОС, поэтому память не растёт с числом
+воркеров. Формат:
+
+    заголовок  <8sQQQ>  магия, версия каталога, число заведений, смещение индекса
+    записи              JSON PlaceSchema по заведению, в порядке full_name, id
+    индекс     <Q>*N+1  смещения записей (последнее — конец последней записи)
+
+Страница offset/limit — два смещения из индекса и срез файла, без БД и
+Pydantic. Новый снимок пишется во временный файл и подменяет старый через
+os.replace; читатели замечают подмену по stat() и переоткрывают файл.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import mmap
+import time
+import fcntl
+import struct
+import asyncio
+import argparse
+from array import array
+from typing import Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
+
+from config import CATALOG_SNAPSHOT_PATH, CATALOG_SNAPSHOT_REFRESH
+from database.database import AsyncSessionLocal
+from database.models import Place, CatalogVersion
+from api.utils.schemas import PlaceSchema
+from api.utils.logger import logger
+
+MAGIC = b"CATSNAP1"
+HEADER = struct.Struct("<8sQQQ")
+OFFSET = struct.Struct("<Q")
+BUILD_CHUNK = 500
+# как часто запрос проверяет, не подменён ли файл снимка
+STAT_INTERVAL = 1.0
+
+
+# ---------- чтение ---------------------------------------------------------- #
+class CatalogSnapshot:
+    """Снимок, отображённый в память; переоткрывается после подмены файла."""
+
+    def __init__(self, path: str, stat_interval: float = STAT_INTERVAL):
+        self.path = path
+        self.stat_interval = stat_interval
+        self.version = None
+        self.count = 0
+        self._map = None
+        self._index_offset = 0
+        self._file_key = None
+        self._checked_at = float("-inf")
+
+    def reload(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not self.path or (not force and now - self._checked_at < self.stat_interval):
+            return
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._swap(None, None)
+            return
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key == self._file_key:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Снимок каталога {self.path} не открыт: {e}")
+            return
+        try:
+            magic, version, count, index_offset = HEADER.unpack_from(mapped, 0)
+        except struct.error:
+            magic = None
+        # обрезанный или чужой файл: без снимка, выдача идёт из БД
+        if magic != MAGIC or index_offset + OFFSET.size * (count + 1) > len(mapped):
+            mapped.close()
+            self._swap(None, None)
+            logger.warning(f"⚠️ {self.path} — не снимок каталога или файл обрезан")
+            return
+        self._swap(mapped, key)
+        self.version, self.count, self._index_offset = version, count, index_offset
+        logger.info(f"🗺️ Снимок каталога v{version}: {count} заведений")
+
+    def _swap(self, mapped, key) -> None:
+        # срезы mmap — копии (bytes), старое отображение можно закрыть сразу
+        if self._map is not None:
+            self._map.close()
+        self._map, self._file_key = mapped, key
+        if mapped is None:
+            self.version, self.count = None, 0
+
+    def page(self, offset: int, limit: int) -> Optional[bytes]:
+        """JSON-массив заведений [offset, offset + limit) или None без снимка."""
+        self.reload()
+        if self._map is None:
+            return None
+        start = min(offset, self.count)
+        end = min(offset + limit, self.count)
+        bounds = struct.unpack_from(
+            f"<{end - start + 1}Q", self._map, self._index_offset + OFFSET.size * start
+        )
+        records = [self._map[a:b] for a, b in zip(bounds, bounds[1:])]
+        return b"[" + b",".join(records) + b"]"
+
+
+catalog_snapshot = CatalogSnapshot(CATALOG_SNAPSHOT_PATH)
+
+
+# ---------- запись ---------------------------------------------------------- #
+PLACE_RELATIONS = (
+    Place.cuisines,
+    Place.metro_stations,
+    Place.alternate_names,
+    Place.features,
+    Place.visit_purposes,
+    Place.opening_hours,
+    Place.photos,
+    Place.menu_links,
+    Place.booking_links,
+    Place.reviews,
+)
+
+
+async def latest_catalog_version(session) -> int:
+    return await session.scalar(select(func.max(CatalogVersion.id))) or 0
+
+
+def _write_places(f, offsets: array, places: list) -> None:
+    for place in places:
+        offsets.append(f.tell())
+        f.write(PlaceSchema.model_validate(place).model_dump_json().encode())
+
+
+def _finish_file(f, offsets: array, version: int, count: int) -> None:
+    """Индекс смещений, заголовок и fsync."""
+    index_offset = f.tell()
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    f.write(offsets.tobytes())
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, version, count, index_offset))
+    f.flush()
+    os.fsync(f.fileno())
+
+
+async def build_snapshot(path: str = CATALOG_SNAPSHOT_PATH) -> int:
+    """
+    Пишет снимок доступных заведений из primary, возвращает версию каталога.
+    Сборка идёт в воркере API: сериализация Pydantic и запись файла — в потоке,
+    чтобы не останавливать event loop; связи загружены заранее (selectinload).
+    """
+    loop = asyncio.get_running_loop()
+    partial = f"{path}.{os.getpid()}.part"
+    offsets = array("Q")
+    async with AsyncSessionLocal() as session:
+        version = await latest_catalog_version(session)
+        ids = (
+            await session.scalars(
+                select(Place.id)
+                .where(Place.is_available.is_(True))
+                .order_by(Place.full_name, Place.id)
+            )
+        ).all()
+        with open(partial, "wb") as f:
+            f.write(HEADER.pack(MAGIC, version, 0, 0))
+            # в памяти только текущая пачка заведений
+            for i in range(0, len(ids), BUILD_CHUNK):
+                chunk = ids[i : i + BUILD_CHUNK]
+                places = {
+                    place.id: place
+                    for place in await session.scalars(
+                        select(Place)
+                        .options(*(selectinload(rel) for rel in PLACE_RELATIONS))
+                        .where(Place.id.in_(chunk))
+                    )
+                }
+                # скрытые между запросами заведения пропускаются
+                ordered = [places[pid] for pid in chunk if pid in places]
+                await loop.run_in_executor(None, _write_places, f, offsets, ordered)
+                session.expunge_all()
+            offsets.append(f.tell())
+            count = len(offsets) - 1
+            await loop.run_in_executor(None, _finish_file, f, offsets, version, count)
+    os.replace(partial, path)
+    logger.info(f"🗺️ Записан снимок каталога v{version}: {count} заведений")
+    return version
+
+
+async def refresh_snapshot(snapshot: CatalogSnapshot = catalog_snapshot) -> None:
+    """
+    Пересобирает снимок, если в БД вышла новая версия каталога. Собирает один
+    процесс (flock), остальные подхватят готовый файл по stat().
+    """
+    async with AsyncSessionLocal() as session:
+        version = await latest_catalog_version(session)
+    snapshot.reload(force=True)
+    if snapshot.version is not None and snapshot.version >= version:
+        return
+    os.makedirs(os.path.dirname(snapshot.path) or ".", exist_ok=True)
+    with open(f"{snapshot.path}.lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return  # собирает другой воркер
+        # пока ждали блокировку, снимок мог собрать другой воркер
+        snapshot.reload(force=True)
+        if snapshot.version is not None and snapshot.version >= version:
+            return
+        await build_snapshot(snapshot.path)
+    snapshot.reload(force=True)
+
+
+async def keep_snapshot_fresh(snapshot: CatalogSnapshot = catalog_snapshot) -> None:
+    """Фоновая задача воркера API: проверка версии каталога раз в интервал."""
+    if not snapshot.path:
+        return
+    while True:
+        try:
+            await refresh_snapshot(snapshot)
+        except Exception as e:
+            logger.warning(f"⚠️ Снимок каталога не обновлён: {e}")
+        await asyncio.sleep(CATALOG_SNAPSHOT_REFRESH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Собрать снимок каталога")
+    parser.add_argument("--path", default=CATALOG_SNAPSHOT_PATH)
+    args = parser.parse_args()
+    asyncio.run(build_snapshot(args.path))
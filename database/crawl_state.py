@@ -0,0 +1,211 @@
+import os
+import json
+import sqlite3
+from datetime import datetime
+from typing import Optional
+
+from api.utils.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    discovery_done INTEGER NOT NULL DEFAULT 0,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    discovered_at TEXT NOT NULL,
+    seen_run INTEGER NOT NULL,
+    done_run INTEGER,
+    status TEXT NOT NULL DEFAULT 'new',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_modified TEXT,
+    fetched_at TEXT,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_urls_seen_run ON urls (seen_run, done_run);
+"""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+def failed_urls_path(results_file: str) -> str:
+    """Список не скачанных страниц рядом с выгрузкой: restaurants.failed.txt."""
+    return os.path.splitext(results_file)[0] + ".failed.txt"
+
+
+class CrawlState:
+    """
+    Состояние обхода в SQLite: найденные ссылки, статус обработки, Last-Modified
+    и результат разбора по каждому URL. Пишется после каждой ссылки/страницы,
+    поэтому упавший обход продолжается с места остановки: незавершённый прогон
+    подхватывается, уже обработанные в нём URL повторно не запрашиваются.
+
+    Все вызовы — из одного потока (event loop краулера).
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.run_id = None
+
+    def close(self) -> None:
+        self.db.close()
+
+    # ---------- прогоны ---------------------------------------------------- #
+    def begin_run(self) -> bool:
+        """Продолжает незавершённый прогон или начинает новый. True — продолжение."""
+        row = self.db.execute(
+            "SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        if row:
+            self.run_id = row[0]
+            done = self.db.execute(
+                "SELECT count(*) FROM urls WHERE done_run = ?", (self.run_id,)
+            ).fetchone()[0]
+            logger.info(f"♻️ Продолжаем обход #{self.run_id}: обработано {done} ссылок")
+            return True
+        with self.db:
+            self.run_id = self.db.execute(
+                "INSERT INTO runs (started_at) VALUES (?)", (_now(),)
+            ).lastrowid
+        logger.info(f"🆕 Новый обход #{self.run_id}")
+        return False
+
+    def discovery_finished(self) -> None:
+        with self.db:
+            self.db.execute(
+                "UPDATE runs SET discovery_done = 1 WHERE id = ?", (self.run_id,)
+            )
+
+    @property
+    def discovery_done(self) -> bool:
+        row = self.db.execute(
+            "SELECT discovery_done FROM runs WHERE id = ?", (self.run_id,)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def finish_run(self) -> None:
+        with self.db:
+            self.db.execute(
+                "UPDATE runs SET finished_at = ? WHERE id = ?", (_now(), self.run_id)
+            )
+
+    # ---------- ссылки ----------------------------------------------------- #
+    def add_urls(self, urls) -> list[str]:
+        """Отмечает ссылки найденными в прогоне, возвращает ещё не обработанные."""
+        urls = list(dict.fromkeys(urls))
+        now = _now()
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO urls (url, discovered_at, seen_run) VALUES (?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET seen_run = excluded.seen_run",
+                [(url, now, self.run_id) for url in urls],
+            )
+        done = self._done(urls)
+        return [url for url in urls if url not in done]
+
+    def _done(self, urls) -> set:
+        done = set()
+        for i in range(0, len(urls), 500):
+            chunk = urls[i : i + 500]
+            rows = self.db.execute(
+                f"SELECT url FROM urls WHERE done_run = ? AND status != 'failed' "
+                f"AND url IN ({','.join('?' * len(chunk))})",
+                (self.run_id, *chunk),
+            )
+            done.update(row[0] for row in rows)
+        return done
+
+    def pending(self) -> list[str]:
+        """Найденные в текущем прогоне, но не обработанные (или упавшие) ссылки."""
+        rows = self.db.execute(
+            "SELECT url FROM urls WHERE seen_run = ? "
+            "AND (done_run IS NULL OR done_run != ? OR status = 'failed') "
+            "ORDER BY discovered_at",
+            (self.run_id, self.run_id),
+        )
+        return [row[0] for row in rows]
+
+    def mark(
+        self,
+        url: str,
+        status: str,
+        record: Optional[dict] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        with self.db:
+            self.db.execute(
+                "UPDATE urls SET done_run = ?, status = ?, attempts = attempts + 1, "
+                "last_modified = coalesce(?, last_modified), fetched_at = ?, "
+                "record = ? WHERE url = ?",
+                (
+                    self.run_id,
+                    status,
+                    last_modified,
+                    _now(),
+                    json.dumps(record, ensure_ascii=False) if record else None,
+                    url,
+                ),
+            )
+
+    # ---------- выгрузка --------------------------------------------------- #
+    def counts(self) -> dict:
+        rows = self.db.execute(
+            "SELECT status, count(*) FROM urls WHERE seen_run = ? GROUP BY status",
+            (self.run_id,),
+        )
+        return dict(rows.fetchall())
+
+    def export_urls(self, path: str) -> int:
+        rows = self.db.execute(
+            "SELECT url FROM urls WHERE seen_run = ? ORDER BY discovered_at",
+            (self.run_id,),
+        )
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for (url,) in rows:
+                f.write(f"{url}\n")
+                count += 1
+        return count
+
+    def export_records(self, path: str) -> int:
+        """JSON Lines из всех разобранных в прогоне страниц (.part -> os.replace)."""
+        rows = self.db.execute(
+            "SELECT record FROM urls WHERE seen_run = ? AND done_run = ? "
+            "AND status = 'parsed' ORDER BY discovered_at",
+            (self.run_id, self.run_id),
+        )
+        partial = path + ".part"
+        count = 0
+        with open(partial, "w", encoding="utf-8") as f:
+            for (record,) in rows:
+                f.write(record + "\n")
+                count += 1
+        os.replace(partial, path)
+        return count
+
+    def export_failed(self, path: str) -> int:
+        """
+        Страницы прогона, которые не удалось скачать: импорт не скрывает эти
+        заведения, а отмечает встреченными (.part -> os.replace).
+        """
+        rows = self.db.execute(
+            "SELECT url FROM urls WHERE seen_run = ? AND done_run = ? "
+            "AND status = 'failed' ORDER BY discovered_at",
+            (self.run_id, self.run_id),
+        )
+        partial = path + ".part"
+        count = 0
+        with open(partial, "w", encoding="utf-8") as f:
+            for (url,) in rows:
+                f.write(f"{url}\n")
+                count += 1
+        os.replace(partial, path)
+        return count
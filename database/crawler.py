@@ -0,0 +1,396 @@
+"""
+Асинхронный обход страниц ресторанов.
+
+    python -m database.crawler database/restaurants.txt database/restaurants.jsonl
+
+Общий keep-alive пул соединений aiohttp, ограничение параллелизма и частоты
+запросов на хост, повторы с экспоненциальной задержкой и jitter. Каждая
+страница разбирается RestaurantParser в пуле процессов (CPU-bound разбор
+не блокирует event loop и занимает все ядра). Базовый адрес берётся из самих URL,
+так что обход можно направить на локальный сервер с сохранёнными страницами.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import time
+import random
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from database.restaurant_parser import parse_page
+from database.page_cache import PageCache, MISSING
+from database.crawl_state import failed_urls_path
+from database.name_normalizer import parse_duration
+from config import (
+    CRAWL_CONCURRENCY,
+    CRAWL_RATE_PER_HOST,
+    CRAWL_MAX_RETRIES,
+    CRAWL_TIMEOUT,
+    CRAWL_CACHE_DIR,
+    CRAWL_PARSE_WORKERS,
+)
+from api.utils.logger import logger
+
+PROGRESS_EVERY = 100
+# страница удалена: заведение скрывается, а не удерживается как временный сбой
+GONE_STATUSES = (404, 410)
+USER_AGENT = "Mozilla/5.0 (compatible; serj-crawler/1.0)"
+
+
+class RetryableFetchError(Exception):
+    pass
+
+
+class CrawlResult(NamedTuple):
+    url: str
+    status: str  # parsed | skipped | gone | failed
+    record: Optional[dict]
+    last_modified: Optional[str]
+
+
+class Page(NamedTuple):
+    status: int
+    body: Optional[bytes]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    encoding: Optional[str]
+
+
+class HostRateLimiter:
+    """Не больше rate запросов в секунду на хост, равномерно, без всплесков."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = {}
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class CrawlStats:
+    def __init__(self, total: Optional[int] = None):
+        self.total = total
+        self.started = time.monotonic()
+        self.fetched = 0
+        self.parsed = 0
+        self.skipped = 0
+        self.gone = 0
+        self.failed = 0
+        self.retries = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+        self.bytes = 0
+
+    @property
+    def done(self) -> int:
+        return self.parsed + self.skipped + self.gone + self.failed
+
+    def as_dict(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "done": self.done,
+            "total": self.total,
+            "fetched": self.fetched,
+            "parsed": self.parsed,
+            "skipped": self.skipped,
+            "gone": self.gone,
+            "failed": self.failed,
+            "retries": self.retries,
+            "not_modified": self.not_modified,
+            "cache_hits": self.cache_hits,
+            "megabytes": round(self.bytes / 2**20, 2),
+            "seconds": round(elapsed, 1),
+            "pages_per_sec": round(self.done / elapsed, 2) if elapsed else None,
+        }
+
+    def log(self, final: bool = False) -> None:
+        s = self.as_dict()
+        eta = ""
+        if not final and self.total and s["pages_per_sec"]:
+            eta = f", осталось ~{(self.total - self.done) / s['pages_per_sec']:.0f} сек"
+        logger.info(
+            f"{'✅' if final else '🕷️'} Обход: {s['done']}"
+            f"{'/' + str(self.total) if self.total else ''} страниц, "
+            f"разобрано {s['parsed']}, пропущено {s['skipped']}, удалено {s['gone']}, "
+            f"ошибок {s['failed']}, "
+            f"повторов {s['retries']}, 304: {s['not_modified']}, "
+            f"без разбора {s['cache_hits']}, {s['megabytes']} МБ, "
+            f"{s['pages_per_sec']} стр/сек{eta}"
+        )
+
+
+class Crawler:
+    """
+    async with Crawler() as crawler:
+        await crawler.run(urls, on_result)
+    """
+
+    def __init__(
+        self,
+        concurrency: int = CRAWL_CONCURRENCY,
+        rate_per_host: float = CRAWL_RATE_PER_HOST,
+        max_retries: int = CRAWL_MAX_RETRIES,
+        timeout: float = CRAWL_TIMEOUT,
+        cache: Optional[PageCache] = None,
+        parse_workers: int = CRAWL_PARSE_WORKERS,
+    ):
+        self.cache = cache
+        self.parse_workers = parse_workers
+        self._pool = None
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.stats = CrawlStats()
+        self._http = None
+
+    async def __aenter__(self):
+        self._http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.concurrency, ttl_dns_cache=300, keepalive_timeout=30
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT},
+        )
+        if self.parse_workers:
+            self._pool = ProcessPoolExecutor(self.parse_workers)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._http.close()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    # ---------- HTTP ------------------------------------------------------- #
+    async def fetch(self, url: str, headers: Optional[dict] = None) -> Page:
+        host = urlparse(url).netloc
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.wait(host)
+            try:
+                return await self._get(url, headers)
+            except (
+                RetryableFetchError,
+                aiohttp.ClientConnectionError,
+                aiohttp.ClientPayloadError,
+                asyncio.TimeoutError,
+            ) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = getattr(e, "retry_after", None) or self._backoff(attempt)
+                self.stats.retries += 1
+                logger.debug(f"🔁 {url}: {e}, повтор через {delay:.1f} сек")
+                await asyncio.sleep(delay)
+
+    async def _get(self, url: str, headers: Optional[dict]) -> Page:
+        async with self._http.get(url, headers=headers) as resp:
+            if resp.status == 429 or resp.status >= 500:
+                error = RetryableFetchError(f"HTTP {resp.status}")
+                error.retry_after = parse_duration(resp.headers.get("retry-after"))
+                raise error
+            if resp.status == 304:
+                self.stats.not_modified += 1
+                return Page(304, None, None, None, None)
+            resp.raise_for_status()
+            body = await resp.read()
+            encoding = resp.get_encoding()
+        self.stats.fetched += 1
+        self.stats.bytes += len(body)
+        return Page(
+            resp.status,
+            body,
+            resp.headers.get("ETag"),
+            resp.headers.get("Last-Modified"),
+            encoding,
+        )
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(30.0, 0.5 * 2**attempt) * random.uniform(0.5, 1.5)
+
+    # ---------- обход ------------------------------------------------------ #
+    async def parse(self, body: bytes, encoding: str, url: str) -> Optional[dict]:
+        html = body.decode(encoding, errors="replace")
+        if self._pool is None:
+            return parse_page(html, url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, parse_page, html, url)
+
+    async def process(self, url: str) -> CrawlResult:
+        try:
+            record, last_modified = await self._fetch_and_parse(url)
+        except Exception as e:
+            if getattr(e, "status", None) in GONE_STATUSES:  # ClientResponseError
+                self.stats.gone += 1
+                logger.info(f"🗑️ {url}: HTTP {e.status}, страница удалена")
+                return CrawlResult(url, "gone", None, None)
+            self.stats.failed += 1
+            logger.warning(f"⚠️ Ошибка при обработке {url}: {e}")
+            return CrawlResult(url, "failed", None, None)
+        if record is None:
+            self.stats.skipped += 1
+            logger.warning(f"⚠️ Парсинг {url} вернул None")
+            return CrawlResult(url, "skipped", None, last_modified)
+        self.stats.parsed += 1
+        return CrawlResult(url, "parsed", record, last_modified)
+
+    async def _fetch_and_parse(self, url: str) -> tuple[Optional[dict], Optional[str]]:
+        if self.cache is None:
+            page = await self.fetch(url)
+            record = await self.parse(page.body, page.encoding, url)
+            return record, page.last_modified
+
+        meta = self.cache.meta(url)
+        page = await self.fetch(url, self.cache.conditional_headers(meta))
+        if page.status == 304:
+            digest, encoding, body = meta["sha256"], meta["encoding"], None
+        else:
+            digest, encoding, body = (
+                self.cache.store_page(page.body),
+                page.encoding,
+                page.body,
+            )
+
+        record = self.cache.load_record(url, digest)
+        if record is MISSING:
+            if body is None:
+                body = self.cache.load_page(digest)
+            if body is None:
+                # 304, но тело из кэша пропало — запрашиваем заново целиком
+                page = await self.fetch(url)
+                digest, encoding, body = (
+                    self.cache.store_page(page.body),
+                    page.encoding,
+                    page.body,
+                )
+            record = await self.parse(body, encoding, url)
+            self.cache.save_record(url, digest, record)
+        else:
+            # тело не изменилось — разбор не нужен
+            self.stats.cache_hits += 1
+
+        if page.status == 304:
+            return record, meta.get("last_modified")
+        self.cache.save_meta(
+            url,
+            etag=page.etag,
+            last_modified=page.last_modified,
+            sha256=digest,
+            encoding=encoding,
+        )
+        return record, page.last_modified
+
+    async def run(self, urls, on_result) -> CrawlStats:
+        """
+        Обходит urls (обычный или асинхронный итератор — можно подавать ссылки
+        по мере их обнаружения) фиксированным числом воркеров.
+        on_result(CrawlResult) вызывается для каждого URL.
+        """
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker():
+            while (url := await queue.get()) is not None:
+                on_result(await self.process(url))
+                if self.stats.done % PROGRESS_EVERY == 0:
+                    self.stats.log()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            if hasattr(urls, "__aiter__"):
+                async for url in urls:
+                    await queue.put(url)
+            else:
+                for url in urls:
+                    await queue.put(url)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        self.stats.log(final=True)
+        return self.stats
+
+
+def read_urls(filename: str):
+    with open(filename, "r", encoding="utf-8") as f:
+        yield from dict.fromkeys(filter(None, map(str.strip, f)))
+
+
+async def crawl_to_file(
+    urls_file: str, results_file: str, cache_dir: str = CRAWL_CACHE_DIR, **options
+) -> CrawlStats:
+    """JSON Lines через .part -> os.replace: импорт не увидит недописанный файл."""
+    partial_file = results_file + ".part"
+    failed_file = failed_urls_path(results_file)
+    with open(partial_file, "w", encoding="utf-8") as out, open(
+        failed_file + ".part", "w", encoding="utf-8"
+    ) as failed:
+
+        def write(result):
+            if result.record is not None:
+                out.write(json.dumps(result.record, ensure_ascii=False) + "\n")
+            elif result.status == "failed":
+                failed.write(f"{result.url}\n")
+
+        cache = PageCache(cache_dir) if cache_dir else None
+        async with Crawler(cache=cache, **options) as crawler:
+            urls = list(read_urls(urls_file))
+            crawler.stats.total = len(urls)
+            stats = await crawler.run(urls, write)
+
+    # список упавших страниц — до выгрузки: импорт читает их вместе
+    os.replace(failed_file + ".part", failed_file)
+    os.replace(partial_file, results_file)
+    logger.info(f"✅ Записано {stats.parsed} заведений в {results_file}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("urls", nargs="?", default="database/restaurants.txt")
+    parser.add_argument("out", nargs="?", default="database/restaurants.jsonl")
+    parser.add_argument("--concurrency", type=int, default=CRAWL_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=CRAWL_RATE_PER_HOST)
+    parser.add_argument("--retries", type=int, default=CRAWL_MAX_RETRIES)
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=CRAWL_PARSE_WORKERS,
+        help="процессов для разбора, 0 — в event loop",
+    )
+    parser.add_argument(
+        "--cache-dir", default=CRAWL_CACHE_DIR, help="пустая строка — без кэша"
+    )
+    parser.add_argument(
+        "--reparse",
+        action="store_true",
+        help="сбросить кэш разбора (после изменения RestaurantParser)",
+    )
+    args = parser.parse_args()
+    if args.reparse and args.cache_dir:
+        PageCache(args.cache_dir).invalidate_records()
+    asyncio.run(
+        crawl_to_file(
+            args.urls,
+            args.out,
+            concurrency=args.concurrency,
+            rate_per_host=args.rate,
+            max_retries=args.retries,
+            cache_dir=args.cache_dir,
+            parse_workers=args.parse_workers,
+        )
+    )
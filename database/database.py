@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -10,23 +11,116 @@ from config import (
     postgres_host,
     postgres_port,
     postgres_db,
+    postgres_replica_host,
+    postgres_replica_port,
+    DB_REPLICA_MAX_LAG_SECONDS,
+    DB_REPLICA_LAG_CHECK_INTERVAL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_STATEMENT_TIMEOUT_MS,
 )
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import sessionmaker
+from database.pool_metrics import instrumented_pool
+from database.query_metrics import instrument_engine
+from api.utils.logger import logger
 
 
-def get_database_url():
+def get_database_url(host=postgres_host, port=postgres_port):
     return (
         f"postgresql+asyncpg://{postgres_user}:{postgres_password}@"
-        f"{postgres_host}:{postgres_port}/{postgres_db}"
+        f"{host}:{port}/{postgres_db}"
+        f"?prepared_statement_cache_size={DB_STATEMENT_CACHE_SIZE}"
     )
 
 
-engine = create_async_engine(get_database_url(), echo=False)
+def get_connect_args() -> dict:
+    server_settings = {}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        server_settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+    return {
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "server_settings": server_settings,
+    }
+
+
+def build_engine(url: str, db: str):
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=instrumented_pool(db),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=get_connect_args(),
+    )
+
+
+engine = build_engine(get_database_url(), "primary")
+instrument_engine(engine, "primary")
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-Base = declarative_base()
+
+
+# Реплика: если не задана или отстаёт, читающие запросы идут на primary
+replica_engine = (
+    build_engine(
+        get_database_url(postgres_replica_host, postgres_replica_port), "replica"
+    )
+    if postgres_replica_host
+    else None
+)
+if replica_engine is not None:
+    instrument_engine(replica_engine, "replica")
+ReplicaSessionLocal = (
+    sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None
+    else None
+)
+
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+_replica_state = {"checked_at": float("-inf"), "usable": False}
+
+
+async def replica_is_fresh() -> bool:
+    """Отставание реплики, проверяемое не чаще раза в DB_REPLICA_LAG_CHECK_INTERVAL."""
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] < DB_REPLICA_LAG_CHECK_INTERVAL:
+        return _replica_state["usable"]
+    _replica_state["checked_at"] = now
+
+    try:
+        async with replica_engine.connect() as conn:
+            lag = await conn.scalar(REPLICA_LAG_SQL)
+        usable = lag is not None and float(lag) <= DB_REPLICA_MAX_LAG_SECONDS
+        if not usable:
+            logger.warning(f"⚠️ Реплика отстаёт ({lag} сек), чтение с primary")
+    except Exception as e:
+        logger.warning(f"⚠️ Реплика недоступна, чтение с primary: {e}")
+        usable = False
+    _replica_state["usable"] = usable
+    return usable
 
 
 async def get_db():
     async with AsyncSessionLocal() as db:
         yield db
+
+
+async def get_read_db():
+    """Сессия для обработчиков только на чтение."""
+    if replica_engine is not None and await replica_is_fresh():
+        async with ReplicaSessionLocal() as db:
+            yield db
+    else:
+        async with AsyncSessionLocal() as db:
+            yield db
@@ -0,0 +1,356 @@
+"""
+Сбор ссылок на страницы ресторанов.
+
+    python -m database.discovery --engine sitemap --out database/restaurants.txt
+    python -m database.discovery --check   # движки на записанных ответах
+
+Движки (CRAWL_DISCOVERY):
+    sitemap  — sitemap.xml (в т.ч. sitemapindex и .gz) по HTTP;
+    listing  — постраничная выдача каталога по HTTP;
+    selenium — прокрутка каталога в браузере (медленно, нужен контейнер selenium);
+    auto     — по очереди sitemap, listing, selenium до первого успешного.
+Адреса настраиваются, так что движки можно проверить на локальном сервере
+с записанными ответами: --check поднимает его на database/fixtures/discovery
+и выходит с кодом 1, если какой-то движок собрал не тот список.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import re
+import gzip
+import time
+import asyncio
+import argparse
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from database.crawler import Crawler
+from database.restaurant_parser import DEFAULT_BACKEND
+from config import (
+    CRAWL_DISCOVERY,
+    CRAWL_SITEMAP_URL,
+    CRAWL_LISTING_URL,
+    CRAWL_LISTING_MAX_PAGES,
+    CRAWL_DISCOVERY_MIN_SHARE,
+    SELENIUM_URL,
+)
+from api.utils.logger import logger
+
+CATALOG_URL = "https://leclick.ru/restaurants/index"
+LINK_SELECTOR = 'a.image[href^="/restaurant/"]'
+RESTAURANT_PATH_RE = re.compile(r"^/restaurant/[^/]+/?$")
+MAX_WAIT = 10
+SCROLL_PAUSE = 1
+FIXTURES_DIR = "database/fixtures/discovery"
+RECORDED_HOST = "https://leclick.ru"
+
+
+class DiscoveryError(Exception):
+    pass
+
+
+def is_restaurant_url(url: str) -> bool:
+    return bool(RESTAURANT_PATH_RE.match(urlparse(url).path))
+
+
+# ---------- sitemap -------------------------------------------------------- #
+def parse_sitemap(body: bytes, url: str) -> tuple[list[str], list[str]]:
+    """(вложенные sitemap, адреса страниц) из sitemap.xml / sitemapindex."""
+    if url.endswith(".gz") or body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+    root = ET.fromstring(body)
+    locs = [
+        el.text.strip()
+        for el in root.iter()
+        if el.tag.rsplit("}", 1)[-1] == "loc" and el.text
+    ]
+    if root.tag.rsplit("}", 1)[-1] == "sitemapindex":
+        return locs, []
+    return [], locs
+
+
+async def sitemap_links(crawler: Crawler, on_links, sitemap_url: str) -> int:
+    pending, visited, total = [sitemap_url], set(), 0
+    while pending:
+        url = pending.pop(0)
+        if url in visited:
+            continue
+        visited.add(url)
+        page = await crawler.fetch(url)
+        try:
+            nested, pages = parse_sitemap(page.body, url)
+        except (ET.ParseError, OSError) as e:
+            raise DiscoveryError(f"некорректный sitemap {url}: {e}")
+        pending.extend(nested)
+        links = [link for link in pages if is_restaurant_url(link)]
+        if links:
+            total += len(links)
+            on_links(links)
+    if not total:
+        raise DiscoveryError(f"в {sitemap_url} нет ссылок на рестораны")
+    return total
+
+
+# ---------- постраничный каталог ------------------------------------------ #
+def listing_page_links(html: str, base_url: str) -> list[str]:
+    soup = BeautifulSoup(html, DEFAULT_BACKEND)
+    return [urljoin(base_url, a["href"]) for a in soup.select(LINK_SELECTOR)]
+
+
+async def listing_links(
+    crawler: Crawler, on_links, listing_url: str, max_pages: int
+) -> int:
+    """Страницы каталога по порядку, пока очередная не перестанет давать новое."""
+    seen = set()
+    for page_no in range(1, max_pages + 1):
+        url = listing_url.format(page=page_no)
+        try:
+            page = await crawler.fetch(url)
+        except aiohttp.ClientResponseError as e:
+            # страница за последней — 404 у части каталогов
+            if e.status == 404 and seen:
+                break
+            raise
+        html = page.body.decode(page.encoding, errors="replace")
+        new = [link for link in listing_page_links(html, url) if link not in seen]
+        if not new:
+            break
+        seen.update(new)
+        on_links(new)
+    if not seen:
+        raise DiscoveryError(f"в {listing_url} нет ссылок на рестораны")
+    return len(seen)
+
+
+# ---------- Selenium ------------------------------------------------------- #
+def selenium_links(on_links) -> int:
+    """
+    Прокрутка каталога в Selenium (блокирующая, запускается в отдельном
+    потоке). on_links получает новые ссылки после каждой прокрутки.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.firefox.options import Options
+
+    options = Options()
+    options.headless = True
+    driver = webdriver.Remote(command_executor=SELENIUM_URL, options=options)
+
+    driver.get(CATALOG_URL)
+    restaurant_links = set()
+
+    def scroll_to_bottom():
+        last_height = driver.execute_script("return document.body.scrollHeight")
+        while True:
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(SCROLL_PAUSE)
+            new_height = driver.execute_script("return document.body.scrollHeight")
+            if new_height == last_height:
+                break
+            last_height = new_height
+
+    try:
+        while True:
+            WebDriverWait(driver, MAX_WAIT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "a.image"))
+            )
+            links = driver.find_elements(By.CSS_SELECTOR, LINK_SELECTOR)
+            new = []
+            for link in links:
+                href = link.get_attribute("href")
+                if href and href not in restaurant_links:
+                    restaurant_links.add(href)
+                    new.append(href)
+            if new:
+                logger.info(
+                    f"🔗 Найдено ссылок: {len(new)} (всего {len(restaurant_links)})"
+                )
+                on_links(new)
+
+            prev_count = len(links)
+            scroll_to_bottom()
+
+            new_links = driver.find_elements(By.CSS_SELECTOR, LINK_SELECTOR)
+            if len(new_links) == prev_count:
+                logger.info("📦 Завершен сбор всех ссылок")
+                break
+    finally:
+        driver.quit()
+
+    return len(restaurant_links)
+
+
+# ---------- выбор движка --------------------------------------------------- #
+async def discover_links(
+    crawler: Crawler,
+    on_links,
+    engine: str = CRAWL_DISCOVERY,
+    min_links: int = 0,
+    sitemap_url: str = CRAWL_SITEMAP_URL,
+    listing_url: str = CRAWL_LISTING_URL,
+):
+    """
+    Собирает ссылки выбранным движком (auto — с откатом на следующий).
+    Движок, нашедший меньше min_links ссылок, считается упавшим: неполный
+    список скрыл бы на финальном шаге все ненайденные заведения.
+    """
+    engines = {
+        "sitemap": lambda: sitemap_links(crawler, on_links, sitemap_url),
+        "listing": lambda: listing_links(
+            crawler, on_links, listing_url, CRAWL_LISTING_MAX_PAGES
+        ),
+        "selenium": lambda: asyncio.get_running_loop().run_in_executor(
+            None, selenium_links, on_links
+        ),
+    }
+    order = list(engines) if engine == "auto" else [engine]
+    for name in order:
+        try:
+            total = await engines[name]()
+            if total < min_links:
+                raise DiscoveryError(
+                    f"найдено {total} ссылок, ожидалось не меньше {min_links}"
+                )
+        except Exception as e:
+            if name == order[-1]:
+                raise
+            logger.warning(f"⚠️ Сбор ссылок через {name} не удался: {e}")
+            continue
+        logger.info(f"🔎 Ссылки собраны через {name}: {total}")
+        return total
+
+
+# ---------- проверка на записанных ответах -------------------------------- #
+def fixtures_app(fixtures_dir: str):
+    """
+    Отдаёт записанные ответы, подставляя адрес локального сервера вместо
+    leclick.ru. /ignored/index — каталог, который игнорирует ?page=.
+    """
+    from aiohttp import web
+
+    def load(name: str, request) -> bytes:
+        path = os.path.join(fixtures_dir, name)
+        if not os.path.isfile(path):
+            raise web.HTTPNotFound()
+        with open(path, "rb") as f:
+            body = f.read()
+        local = f"{request.scheme}://{request.host}".encode()
+        return body.replace(RECORDED_HOST.encode(), local)
+
+    async def sitemap(request):
+        name = request.match_info["name"]
+        if name.endswith(".gz"):
+            return web.Response(body=gzip.compress(load(name[:-3], request)))
+        return web.Response(body=load(name, request), content_type="application/xml")
+
+    async def listing(request):
+        page = request.query.get("page", "1")
+        body = load(f"listing-{page}.html", request)
+        return web.Response(body=body, content_type="text/html", charset="utf-8")
+
+    async def ignored_page(request):
+        body = load("listing-1.html", request)
+        return web.Response(body=body, content_type="text/html", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/{name:sitemap[^/]*}", sitemap)
+    app.router.add_get("/restaurants/index", listing)
+    app.router.add_get("/ignored/index", ignored_page)
+    return app
+
+
+PAGED = "/restaurants/index?page={page}"
+IGNORED = "/ignored/index?page={page}"
+# (название, движок, sitemap, каталог, должен ли движок принять список)
+CHECK_CASES = (
+    ("sitemap", "sitemap", "/sitemap.xml", PAGED, True),
+    ("listing", "listing", "/sitemap.xml", PAGED, True),
+    ("auto без sitemap", "auto", "/nope.xml", PAGED, True),
+    ("?page= игнорируется", "listing", "/sitemap.xml", IGNORED, False),
+)
+
+
+async def check(fixtures_dir: str = FIXTURES_DIR) -> int:
+    """Каждый HTTP-движок на локальном сервере с записанными ответами."""
+    from aiohttp import web
+
+    runner = web.AppRunner(fixtures_app(fixtures_dir), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    with open(os.path.join(fixtures_dir, "expected.txt"), encoding="utf-8") as f:
+        expected = sorted(line.strip().replace(RECORDED_HOST, base) for line in f)
+    # как в конвейере: порог — доля «доступных сейчас» заведений
+    min_links = int(len(expected) * CRAWL_DISCOVERY_MIN_SHARE)
+
+    failed = 0
+    try:
+        async with Crawler(parse_workers=0, max_retries=0) as crawler:
+            for title, engine, sitemap_url, listing_url, accept in CHECK_CASES:
+                found = {}
+                try:
+                    await discover_links(
+                        crawler,
+                        lambda links: found.update(dict.fromkeys(links)),
+                        engine,
+                        min_links,
+                        sitemap_url=base + sitemap_url,
+                        listing_url=base + listing_url,
+                    )
+                    error = None
+                except DiscoveryError as e:
+                    error = e
+                if accept and error is not None:
+                    logger.error(f"❌ {title}: {error}")
+                elif accept and sorted(found) != expected:
+                    logger.error(f"❌ {title}: {len(found)} ссылок из {len(expected)}")
+                elif not accept and error is None:
+                    logger.error(f"❌ {title}: принят неполный список ({len(found)})")
+                else:
+                    logger.info(f"✅ {title}")
+                    continue
+                failed = 1
+    finally:
+        await runner.cleanup()
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--engine",
+        default=CRAWL_DISCOVERY,
+        choices=("auto", "sitemap", "listing", "selenium"),
+    )
+    parser.add_argument("--out", default="database/restaurants.txt")
+    parser.add_argument(
+        "--min-links", type=int, default=0, help="меньше ссылок — движок упал"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="проверить движки на записанных ответах"
+    )
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(asyncio.run(check()))
+
+    async def main():
+        found = {}
+        async with Crawler(parse_workers=0) as crawler:
+            await discover_links(
+                crawler,
+                lambda links: found.update(dict.fromkeys(links)),
+                args.engine,
+                args.min_links,
+            )
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.writelines(f"{link}\n" for link in found)
+        logger.info(f"✅ Собрано {len(found)} ссылок. Сохранено в {args.out}")
+
+    asyncio.run(main())
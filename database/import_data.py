@@ -1,15 +1,21 @@
 import sys
-import os
 import asyncio
 import uuid
 import json
-import time
+import hashlib
+import argparse
 from pathlib import Path
+from datetime import datetime
+from itertools import islice
 from contextlib import asynccontextmanager
 
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from database.models import (
     Place,
+    CatalogVersion,
     AlternateName,
     MetroStation,
     Cuisine,
@@ -20,67 +26,24 @@ from database.models import (
     MenuLink,
     BookingLink,
     Review,
+    place_alternate_names,
+    place_metro_stations,
+    place_cuisines,
+    place_features,
+    place_visit_purposes,
 )
-from database.database import engine, Base, AsyncSessionLocal
+from database.database import (
+    engine,
+    AsyncSessionLocal,
+    get_database_url,
+    get_connect_args,
+)
+from database.schema import check_schema_version
+from database.crawl_state import failed_urls_path
+from database.name_normalizer import NameNormalizer
+from database.import_report import ImportReport
+from config import CRAWL_DISCOVERY_MIN_SHARE
 from api.utils.logger import logger
-import requests
-
-
-# ---------- LLM helper ----------------------------------------------------- #
-def generate_llm_reply(prompt: list[dict]) -> str:
-    """Запрос к Groq-LLM с отладкой ошибок."""
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {os.getenv('GROQ_TOKEN')}",
-        "Content-Type": "application/json",
-    }
-    data = {
-        "model": "llama3-70b-8192",
-        "messages": prompt,
-        "temperature": 0.7,
-        "max_tokens": 1024,
-        "top_p": 1,
-        "stream": False,
-    }
-    try:
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        content = response.json()["choices"][0]["message"]["content"].strip()
-        time.sleep(0.5)  # пауза между запросами к LLM
-        return content
-    except requests.RequestException as e:
-        logger.error(f"[ERROR] Request failed: {e}")
-        raise RuntimeError(f"Ошибка при получении ответа от модели: {e}")
-    except (KeyError, IndexError) as e:
-        logger.error(f"[ERROR] Invalid response structure: {e}")
-        raise RuntimeError(f"Ошибка обработки ответа от модели: {e}")
-
-
-def normalize_place_name(full_name: str, address: str) -> str:
-    """Получает короткое имя заведения через LLM."""
-    prompt = [
-        {
-            "role": "user",
-            "content": f"""
-
-Ты — система нормализации названий заведений.
-
-Название: "{full_name}"
-Адрес: "{address}"
-
-
-Верни только одно строковое значение в формате:
-<Короткое название> (ул. <название улицы>)
-""".strip(),
-        }
-    ]
-    return generate_llm_reply(prompt)
-
-
-async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("📦 Таблицы успешно созданы.")
 
 
 @asynccontextmanager
@@ -101,188 +64,527 @@ async def get_async_session():
 
 
 # ---------- Импорт --------------------------------------------------------- #
-BATCH_SIZE = 30  # сколько заведений фиксируем одним commit'ом
-
-
-async def import_from_json(filename: str) -> None:
-    logger.info(f"📂 Начат импорт из файла: {filename}")
-    await create_tables()
+BATCH_SIZE = 500  # сколько заведений пишем одним набором INSERT'ов и commit'ом
+
+# справочник, таблица связи, колонка связи, ключ в JSON
+LOOKUPS = (
+    (AlternateName, place_alternate_names, "alternate_name_id", "alternate_name"),
+    (MetroStation, place_metro_stations, "metro_station_id", "close_metro"),
+    (Cuisine, place_cuisines, "cuisine_id", "main_cuisine"),
+    (Feature, place_features, "feature_id", "features"),
+    (VisitPurpose, place_visit_purposes, "visit_purpose_id", "visit_purposes"),
+)
 
-    with open(filename, "r", encoding="utf-8") as f:
-        data = json.load(f)
+LATIN_TO_CYRILLIC = str.maketrans(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "абцдефгхийклмнопкрстюввхузАБЦДЕФГХИЙКЛМНОПКРСТЮВВХУЗ",
+)
 
-    added = 0
-    skipped = 0
 
-    async with get_async_session() as session:
-        for place_data in data:
-            # пропускаем дубликаты
-            dup_q = select(Place).where(
-                Place.full_name == place_data["full_name"],
-                Place.address == place_data["address"],
-            )
-            if (await session.execute(dup_q)).scalar():
-                skipped += 1
-                logger.info(f"↩️ Пропущено дубликат: {place_data['full_name']}")
-                continue
-
-            # проверяем «главную» ссылку бронирования
-            bl = place_data.get("booking_links", {})
-
-            has_main = (
-                bool(bl.get("main"))
-                if isinstance(bl, dict)
-                else any(link.get("type") == "main" for link in bl)
-            )
+class LookupCache:
+    """Справочники целиком в памяти (имя -> id), догружаются пачками."""
+
+    def __init__(self):
+        self.ids = {model: {} for model, *_ in LOOKUPS}
+
+    async def load(self, session) -> None:
+        for model in self.ids:
+            rows = await session.execute(select(model.name, model.id))
+            self.ids[model] = dict(rows.all())
+
+    async def resolve(self, session, model, names: set) -> None:
+        known = self.ids[model]
+        missing = {name for name in names if name not in known}
+        if not missing:
+            return
+        await session.execute(
+            pg_insert(model)
+            # единый порядок вставки: параллельные импорты не ловят deadlock
+            .values([{"id": uuid.uuid4(), "name": name} for name in sorted(missing)])
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        # id перечитываем: строку могли вставить параллельно
+        rows = await session.execute(
+            select(model.name, model.id).where(model.name.in_(missing))
+        )
+        known.update(rows.all())
+
+
+def has_main_booking_link(place_data: dict) -> bool:
+    bl = place_data.get("booking_links", {})
+    return (
+        bool(bl.get("main"))
+        if isinstance(bl, dict)
+        else any(link.get("type") == "main" for link in bl)
+    )
+
+
+def build_search_text(place_data: dict) -> str:
+    return (
+        (
+            place_data["full_name"]
+            + " "
+            + place_data["address"]
+            + " ".join(place_data.get("close_metro", ""))
+        )
+        .translate(LATIN_TO_CYRILLIC)
+        .lower()
+    )
+
+
+def place_row(place_id, place_data: dict, full_name: str) -> dict:
+    return {
+        "id": place_id,
+        "full_name": full_name,
+        "phone": place_data["phone"],
+        "address": place_data["address"],
+        "type": place_data["type"],
+        "average_check": str(place_data.get("average_check")),
+        "description": place_data["description"],
+        "deposit_rules": place_data.get("deposit_rules"),
+        "coordinates_lat": place_data["coordinates"]["lat"],
+        "coordinates_lon": place_data["coordinates"]["lon"],
+        "source_url": place_data["source"]["url"],
+        "source_domain": place_data["source"]["domain"],
+        "search_text": build_search_text(place_data),
+        "available_online": has_main_booking_link(place_data),
+    }
 
-            place = Place(
-                id=uuid.uuid4(),
-                full_name=normalize_place_name(
-                    place_data["full_name"], place_data["address"]
-                ),
-                phone=place_data["phone"],
-                address=place_data["address"],
-                type=place_data["type"],
-                average_check=str(place_data.get("average_check")),
-                description=place_data["description"],
-                deposit_rules=place_data.get("deposit_rules"),
-                coordinates_lat=place_data["coordinates"]["lat"],
-                coordinates_lon=place_data["coordinates"]["lon"],
-                source_url=place_data["source"]["url"],
-                source_domain=place_data["source"]["domain"],
-                search_text=(
-                    place_data["full_name"]
-                    + " "
-                    + place_data["address"]
-                    + " ".join(place_data.get("close_metro", ""))
-                )
-                .translate(
-                    str.maketrans(
-                        "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
-                        "абцдефгхийклмнопкрстюввхузАБЦДЕФГХИЙКЛМНОПКРСТЮВВХУЗ",
-                    )
-                )
-                .lower(),
-                available_online=has_main,
-            )
 
-            session.add(place)  # place должен быть в сессии сразу
+def child_rows(place_id, place_data: dict) -> dict:
+    """Строки дочерних таблиц заведения: модель -> список словарей."""
+    return {
+        OpeningHour: [
+            {"id": uuid.uuid4(), "day": day, "hours": hours, "place_id": place_id}
+            for day, hours in place_data["opening_hours"].items()
+        ],
+        Photo: [
+            {"id": uuid.uuid4(), "type": photo_type, "url": url, "place_id": place_id}
+            for photo_type, urls in place_data["photos"].items()
+            for url in urls
+        ],
+        MenuLink: [
+            {"id": uuid.uuid4(), "type": link_type, "url": url, "place_id": place_id}
+            for link_type, url in place_data["menu_links"].items()
+        ],
+        BookingLink: [
+            {"id": uuid.uuid4(), "type": link_type, "url": url, "place_id": place_id}
+            for link_type, url in place_data["booking_links"].items()
+        ],
+        Review: [
+            {
+                "id": uuid.uuid4(),
+                "author": r["author"],
+                "date": r["date"],
+                "rating": r["rating"],
+                "text": r["text"],
+                "source": r.get("source"),
+                "place_id": place_id,
+            }
+            for r in place_data["reviews"]
+        ],
+    }
 
-            # связи
-            await process_relationships(session, place, place_data)
 
-            added += 1
+CHILD_MODELS = (OpeningHour, Photo, MenuLink, BookingLink, Review)
 
-            # commit каждые BATCH_SIZE объектов
-            if added % BATCH_SIZE == 0:
-                await session.commit()
-                logger.info(
-                    f"🚀 Добавлен батч из {BATCH_SIZE} заведений (всего: {added})"
-                )
-                await asyncio.sleep(10)
 
-        # финальный commit
-        await session.commit()
-        logger.info(f"✅ Импорт завершён: добавлено {added}, пропущено {skipped}")
+def content_hash(place_data: dict) -> str:
+    payload = json.dumps(
+        place_data, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
 
 
-async def process_relationships(session, place: Place, place_data: dict) -> None:
+async def upsert_places(
+    session,
+    lookups: LookupCache,
+    normalizer: NameNormalizer,
+    batch: list[dict],
+    place_ids: dict,
+    hashes: dict,
+    seen_at: datetime,
+    report: ImportReport,
+) -> None:
     """
-    Создаёт и привязывает связанные объекты.
-    Используем *синхронный* with session.no_autoflush, чтобы place успел попасть в сессию.
+    Записывает пачку новых и изменившихся заведений со всеми связями
+    набором multi-row INSERT'ов. place_ids: source_url -> id уже известных мест,
+    их дочерние строки и связи пересоздаются.
     """
-    with session.no_autoflush:  # <-- FIX here
-        # alternate names
-        for name in place_data["alternate_name"]:
-            alt_name = (
-                await session.execute(
-                    select(AlternateName).where(AlternateName.name == name)
-                )
-            ).scalar()
-            if not alt_name:
-                alt_name = AlternateName(id=uuid.uuid4(), name=name)
-                session.add(alt_name)
-            place.alternate_names.append(alt_name)
-
-        # metro
-        for metro in place_data["close_metro"]:
-            metro_obj = (
+    if not batch:
+        return
+
+    # названия нормализуются параллельно, из кэша — без обращения к LLM
+    with report.stage("normalize") as stage:
+        short_names = await normalizer.normalize_many(
+            session, [(p["full_name"], p["address"]) for p in batch]
+        )
+        stage.rows += len(batch)
+
+    with report.stage("lookups") as stage:
+        for model, _, _, key in LOOKUPS:
+            names = {name for place_data in batch for name in place_data[key]}
+            await lookups.resolve(session, model, names)
+            stage.rows += len(names)
+
+    changed_ids = [
+        place_ids[p["source"]["url"]] for p in batch if p["source"]["url"] in place_ids
+    ]
+    if changed_ids:
+        with report.stage("delete_children") as stage:
+            for model in CHILD_MODELS:
                 await session.execute(
-                    select(MetroStation).where(MetroStation.name == metro)
+                    delete(model).where(model.place_id.in_(changed_ids))
                 )
-            ).scalar()
-            if not metro_obj:
-                metro_obj = MetroStation(id=uuid.uuid4(), name=metro)
-                session.add(metro_obj)
-            place.metro_stations.append(metro_obj)
-
-        # cuisine
-        for cuisine in place_data["main_cuisine"]:
-            cuisine_obj = (
-                await session.execute(select(Cuisine).where(Cuisine.name == cuisine))
-            ).scalar()
-            if not cuisine_obj:
-                cuisine_obj = Cuisine(id=uuid.uuid4(), name=cuisine)
-                session.add(cuisine_obj)
-            place.cuisines.append(cuisine_obj)
-
-        # features
-        for feature in place_data["features"]:
-            feature_obj = (
-                await session.execute(select(Feature).where(Feature.name == feature))
-            ).scalar()
-            if not feature_obj:
-                feature_obj = Feature(id=uuid.uuid4(), name=feature)
-                session.add(feature_obj)
-            place.features.append(feature_obj)
-
-        # purposes
-        for purpose in place_data["visit_purposes"]:
-            purpose_obj = (
+            for _, assoc, _, _ in LOOKUPS:
                 await session.execute(
-                    select(VisitPurpose).where(VisitPurpose.name == purpose)
+                    delete(assoc).where(assoc.c.place_id.in_(changed_ids))
                 )
-            ).scalar()
-            if not purpose_obj:
-                purpose_obj = VisitPurpose(id=uuid.uuid4(), name=purpose)
-                session.add(purpose_obj)
-            place.visit_purposes.append(purpose_obj)
-
-        # opening hours
-        for day, hours in place_data["opening_hours"].items():
-            place.opening_hours.append(
-                OpeningHour(id=uuid.uuid4(), day=day, hours=hours)
+            stage.rows += len(changed_ids)
+
+    places = []
+    links = {assoc: [] for _, assoc, _, _ in LOOKUPS}
+    children = {}
+    for place_data in batch:
+        url = place_data["source"]["url"]
+        place_id = place_ids.get(url) or uuid.uuid4()
+        full_name = short_names[(place_data["full_name"], place_data["address"])]
+        row = place_row(place_id, place_data, full_name)
+        row.update(content_hash=hashes[url], last_seen_at=seen_at, is_available=True)
+        places.append(row)
+
+        for model, assoc, column, key in LOOKUPS:
+            ids = lookups.ids[model]
+            links[assoc].extend(
+                {"place_id": place_id, column: ids[name]} for name in place_data[key]
             )
+        for model, rows in child_rows(place_id, place_data).items():
+            children.setdefault(model, []).extend(rows)
+
+    with report.stage("write_places") as stage:
+        stmt = pg_insert(Place.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["source_url"],
+            set_={col: stmt.excluded[col] for col in places[0] if col != "id"},
+        )
+        await session.execute(stmt, places)
+        stage.rows += len(places)
+    with report.stage("write_links") as stage:
+        for assoc, rows in links.items():
+            if rows:
+                await session.execute(pg_insert(assoc).on_conflict_do_nothing(), rows)
+                stage.rows += len(rows)
+    with report.stage("write_children") as stage:
+        for model, rows in children.items():
+            if rows:
+                await session.execute(insert(model), rows)
+                stage.rows += len(rows)
+
+
+def iter_places(filename: str):
+    """
+    Потоково читает заведения из JSON Lines (по одному в строке).
+    Старый формат — JSON-массив (*.json) — читается целиком.
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        if not filename.endswith(".jsonl"):
+            logger.warning(f"⚠️ {filename} не JSON Lines, файл читается целиком")
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_batches(items, size: int = BATCH_SIZE):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+async def known_places(session, urls: list) -> dict:
+    """source_url -> (id, content_hash) для уже импортированных заведений."""
+    rows = await session.execute(
+        select(Place.source_url, Place.id, Place.content_hash).where(
+            Place.source_url.in_(urls)
+        )
+    )
+    return {url: (place_id, digest) for url, place_id, digest in rows}
+
+
+async def mark_missing_unavailable(session, seen_before: datetime) -> int:
+    """Заведения, не встреченные в выгрузке с seen_before, скрываются из выдачи."""
+    result = await session.execute(
+        update(Place)
+        .where(
+            Place.is_available.is_(True),
+            or_(Place.last_seen_at.is_(None), Place.last_seen_at < seen_before),
+        )
+        .values(is_available=False)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def touch_places(session, urls, seen_at: datetime) -> int:
+    """Отмечает заведения встреченными в текущем обновлении, не переписывая их."""
+    result = await session.execute(
+        update(Place)
+        .where(Place.source_url.in_(list(urls)))
+        .values(last_seen_at=seen_at, is_available=True)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def import_batch(
+    session,
+    lookups: LookupCache,
+    normalizer: NameNormalizer,
+    chunk: list[dict],
+    seen_at: datetime,
+    report: ImportReport,
+) -> None:
+    """Одна пачка дельта-импорта, без commit."""
+    with report.stage("hash") as stage:
+        # повтор страницы в выгрузке — берём последнюю версию
+        by_url = {p["source"]["url"]: p for p in chunk}
+        hashes = {url: content_hash(p) for url, p in by_url.items()}
+        stage.rows += len(by_url)
+    with report.stage("diff") as stage:
+        known = await known_places(session, list(by_url))
+        stage.rows += len(known)
+
+    unchanged = {url for url, (_, digest) in known.items() if digest == hashes[url]}
+    batch = [p for url, p in by_url.items() if url not in unchanged]
+
+    if unchanged:
+        with report.stage("touch_unchanged") as stage:
+            stage.rows += await touch_places(session, unchanged, seen_at)
+    place_ids = {url: place_id for url, (place_id, _) in known.items()}
+    await upsert_places(
+        session, lookups, normalizer, batch, place_ids, hashes, seen_at, report
+    )
+
+    updated = sum(1 for p in batch if p["source"]["url"] in known)
+    report.count(
+        seen=len(by_url),
+        unchanged=len(unchanged),
+        updated=updated,
+        added=len(batch) - updated,
+    )
+    logger.info(
+        f"🚀 Батч: новых {len(batch) - updated}, изменено {updated}, "
+        f"без изменений {len(unchanged)} (всего: {report.counters['seen']})"
+    )
+
+
+async def import_chunk(records: list[dict], seen_at: datetime, keep_urls=()) -> dict:
+    """
+    Импорт одной пачки записей краулера (шаг конвейера Celery).
+    keep_urls — страницы, которые не удалось скачать: заведения остаются
+    в каталоге, а не скрываются на финальном шаге.
+    """
+    report = ImportReport(engine)
+    report.count(seen=0, added=0, updated=0, unchanged=0)
+    async with get_async_session() as session, NameNormalizer() as normalizer:
+        with report.attach():
+            lookups = LookupCache()
+            with report.stage("load_lookups"):
+                await lookups.load(session)
+            if records:
+                await import_batch(
+                    session, lookups, normalizer, records, seen_at, report
+                )
+            if keep_urls:
+                with report.stage("touch_failed") as stage:
+                    stage.rows += await touch_places(session, keep_urls, seen_at)
+            with report.stage("commit"):
+                await session.commit()
+        report.count(
+            llm_requests=normalizer.requests,
+            llm_cache_hits=normalizer.cache_hits,
+            llm_failures=normalizer.failures,
+        )
+    return report.as_dict()
+
 
-        # photos
-        for photo_type, urls in place_data["photos"].items():
-            for url in urls:
-                place.photos.append(Photo(id=uuid.uuid4(), type=photo_type, url=url))
+async def finalize_catalog(started_at: datetime, places_seen: int) -> int:
+    """Скрывает не встреченные в обновлении заведения, выпускает версию каталога."""
+    async with get_async_session() as session:
+        removed = await mark_missing_unavailable(session, started_at)
+        version = CatalogVersion(
+            started_at=started_at, places_seen=places_seen, places_removed=removed
+        )
+        session.add(version)
+        await session.commit()
+        logger.info(
+            f"📦 Каталог v{version.id}: заведений {places_seen}, скрыто {removed}"
+        )
+        return version.id
 
-        # menu links
-        for link_type, url in place_data["menu_links"].items():
-            place.menu_links.append(MenuLink(id=uuid.uuid4(), type=link_type, url=url))
 
-        # booking links
-        for link_type, url in place_data["booking_links"].items():
-            place.booking_links.append(
-                BookingLink(id=uuid.uuid4(), type=link_type, url=url)
+async def discovery_floor(share: float = CRAWL_DISCOVERY_MIN_SHARE) -> int:
+    """
+    Минимум ссылок от движка сбора: доля доступных сейчас заведений. Меньше —
+    сервер отдал не весь каталог (например, игнорирует ?page=), и финальный
+    шаг скрыл бы остальные заведения.
+
+    Вызывается из asyncio.run() обхода, а общий пул engine привязан к циклу
+    воркера Celery, поэтому запрос идёт через отдельный engine без пула.
+    """
+    floor_engine = create_async_engine(
+        get_database_url(), poolclass=NullPool, connect_args=get_connect_args()
+    )
+    try:
+        async with floor_engine.connect() as conn:
+            available = await conn.scalar(
+                select(func.count())
+                .select_from(Place)
+                .where(Place.is_available.is_(True))
             )
+    finally:
+        await floor_engine.dispose()
+    return int(available * share)
+
+
+def read_failed_urls(filename: str) -> list[str]:
+    """URL из списка не скачанных страниц рядом с выгрузкой (если он есть)."""
+    try:
+        with open(failed_urls_path(filename), encoding="utf-8") as f:
+            return list(dict.fromkeys(filter(None, map(str.strip, f))))
+    except FileNotFoundError:
+        return []
+
+
+async def import_from_json(
+    filename: str, mark_missing: bool = True, dry_run: bool = False
+) -> ImportReport:
+    """
+    Дельта-импорт: заведения сопоставляются по source_url, пишутся только
+    новые и те, у которых изменился хэш содержимого. Пропавшие из выгрузки
+    помечаются недоступными (mark_missing), кроме страниц из списка
+    не скачанных рядом с выгрузкой (restaurants.failed.txt).
 
-        # reviews
-        for r in place_data["reviews"]:
-            place.reviews.append(
-                Review(
-                    id=uuid.uuid4(),
-                    author=r["author"],
-                    date=r["date"],
-                    rating=r["rating"],
-                    text=r["text"],
-                    source=r.get("source"),
+    dry_run выполняет все запросы (и LLM) в одной транзакции и откатывает её.
+    Возвращает отчёт по стадиям: время, строки, запросы к БД.
+    """
+    logger.info(f"📂 Начат импорт из файла: {filename}")
+    await check_schema_version(engine)
+
+    run_started = datetime.utcnow()
+    report = ImportReport(engine, dry_run=dry_run)
+    report.count(seen=0, added=0, updated=0, unchanged=0, removed=0)
+
+    async with get_async_session() as session, NameNormalizer() as normalizer:
+        # в dry-run пачки не фиксируются: справочники и кэш имён, вставленные
+        # ранними пачками, должны оставаться видимыми до общего отката
+        finish_batch = session.flush if dry_run else session.commit
+
+        with report.attach():
+            lookups = LookupCache()
+            with report.stage("load_lookups"):
+                await lookups.load(session)
+
+            # в памяти только текущая пачка: расход не зависит от размера каталога
+            chunks = report.timed_iter("read", iter_batches(iter_places(filename)))
+            for chunk in chunks:
+                await import_batch(
+                    session, lookups, normalizer, chunk, run_started, report
                 )
-            )
+                with report.stage("commit"):
+                    await finish_batch()
+
+            if mark_missing and report.counters["seen"]:
+                # не скачанные из-за сбоя страницы не значат, что заведение закрылось
+                keep_urls = read_failed_urls(filename)
+                if keep_urls:
+                    with report.stage("touch_failed") as stage:
+                        stage.rows = await touch_places(
+                            session, keep_urls, run_started
+                        )
+                with report.stage("mark_missing") as stage:
+                    stage.rows = await mark_missing_unavailable(session, run_started)
+                    await finish_batch()
+                report.count(removed=stage.rows)
+            elif mark_missing:
+                logger.warning("⚠️ Выгрузка пуста — доступность заведений не меняем")
+
+            if not dry_run:
+                # новая версия — сигнал API пересобрать снимок каталога
+                session.add(
+                    CatalogVersion(
+                        started_at=run_started,
+                        places_seen=report.counters["seen"],
+                        places_removed=report.counters["removed"],
+                    )
+                )
+                await session.commit()
+
+            if dry_run:
+                await session.rollback()
+
+        stats = report.counters
+        logger.info(
+            f"✅ Импорт завершён{' (dry-run, изменения откачены)' if dry_run else ''}: "
+            f"добавлено {stats['added']}, обновлено {stats['updated']}, "
+            f"без изменений {stats['unchanged']}, скрыто {stats['removed']}"
+        )
+        logger.info(
+            f"🤖 LLM: запросов {normalizer.requests}, из кэша {normalizer.cache_hits}, "
+            f"ошибок {normalizer.failures}"
+        )
+        report.count(
+            llm_requests=normalizer.requests,
+            llm_cache_hits=normalizer.cache_hits,
+            llm_failures=normalizer.failures,
+        )
+    report.log()
+    return report
+
+
+def check_regression(report: ImportReport, baseline_path: str, tolerance: float) -> int:
+    """1, если скорость импорта упала больше чем на tolerance относительно baseline."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    current, expected = report.as_dict()["places_per_sec"], baseline["places_per_sec"]
+    if not current or not expected:
+        logger.warning("⚠️ Нет данных о скорости для сравнения с baseline")
+        return 0
+    if current < expected * (1 - tolerance):
+        logger.error(
+            f"❌ Импорт медленнее baseline: {current} против {expected} заведений/сек"
+        )
+        return 1
+    logger.info(f"✅ Скорость импорта {current} заведений/сек (baseline {expected})")
+    return 0
 
 
 # ---------- Запуск как скрипта -------------------------------------------- #
 if __name__ == "__main__":
-    asyncio.run(import_from_json("database/restaurants.json"))
+    parser = argparse.ArgumentParser(description="Импорт заведений из JSON Lines")
+    parser.add_argument("filename", nargs="?", default="database/restaurants.jsonl")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="всё, кроме фиксации транзакции"
+    )
+    parser.add_argument("--report", help="записать отчёт по стадиям в JSON-файл")
+    parser.add_argument("--baseline", help="отчёт для сравнения скорости")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="допустимое замедление (доля)"
+    )
+    parser.add_argument(
+        "--keep-missing",
+        action="store_true",
+        help="не помечать недоступными заведения, которых нет в файле",
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        import_from_json(
+            args.filename, mark_missing=not args.keep_missing, dry_run=args.dry_run
+        )
+    )
+    if args.report:
+        report.to_json(args.report)
+    if args.baseline:
+        sys.exit(check_regression(report, args.baseline, args.tolerance))
@@ -0,0 +1,135 @@
+import json
+import time
+from contextvars import ContextVar
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from api.utils.logger import logger
+
+# отчёт текущего импорта; greenlet'ы SQLAlchemy наследуют контекст задачи,
+# поэтому запросы других корутин процесса в отчёт не попадают
+_active_report: ContextVar = ContextVar("import_report", default=None)
+
+
+class StageStats:
+    __slots__ = ("seconds", "rows", "queries", "calls")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.rows = 0
+        self.queries = 0
+        self.calls = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "seconds": round(self.seconds, 4),
+            "rows": self.rows,
+            "queries": self.queries,
+            "calls": self.calls,
+            "rows_per_sec": (
+                round(self.rows / self.seconds, 1) if self.seconds else None
+            ),
+        }
+
+
+class ImportReport:
+    """
+    Время, строки и обращения к БД по стадиям импорта.
+
+        report = ImportReport(engine)
+        with report.attach():
+            with report.stage("normalize") as stage:
+                ...
+                stage.rows += len(batch)
+    """
+
+    def __init__(self, engine, dry_run: bool = False):
+        self.engine = engine
+        self.dry_run = dry_run
+        self.stages: dict[str, StageStats] = {}
+        self.counters: dict[str, int] = {}
+        self._current = None
+        self._started = None
+        self.seconds = 0.0
+
+    # ---------- сбор ------------------------------------------------------- #
+    @contextmanager
+    def attach(self):
+        token = _active_report.set(self)
+        event.listen(self.engine.sync_engine, "before_cursor_execute", _count_query)
+        self._started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds = time.perf_counter() - self._started
+            event.remove(self.engine.sync_engine, "before_cursor_execute", _count_query)
+            _active_report.reset(token)
+
+    @contextmanager
+    def stage(self, name: str):
+        stats = self.stages.setdefault(name, StageStats())
+        outer, self._current = self._current, stats
+        started = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - started
+            stats.calls += 1
+            self._current = outer
+
+    def timed_iter(self, name: str, items, rows=len):
+        """Время на получение каждого элемента (чтение/разбор файла) — в стадию name."""
+        items = iter(items)
+        while True:
+            with self.stage(name) as stats:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                stats.rows += rows(item)
+            yield item
+
+    def count(self, **counters) -> None:
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    # ---------- вывод ------------------------------------------------------ #
+    @property
+    def queries(self) -> int:
+        return sum(s.queries for s in self.stages.values())
+
+    def as_dict(self) -> dict:
+        places = self.counters.get("seen", 0)
+        return {
+            "dry_run": self.dry_run,
+            "seconds": round(self.seconds, 4),
+            "queries": self.queries,
+            "places_per_sec": round(places / self.seconds, 1) if self.seconds else None,
+            "counters": dict(self.counters),
+            "stages": {name: s.as_dict() for name, s in self.stages.items()},
+        }
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, ensure_ascii=False, indent=2)
+
+    def log(self) -> None:
+        total = self.seconds or 1.0
+        logger.info(
+            f"⏱️ Импорт{' (dry-run)' if self.dry_run else ''}: "
+            f"{self.seconds:.2f} сек, запросов к БД {self.queries}"
+        )
+        for name, s in sorted(
+            self.stages.items(), key=lambda item: item[1].seconds, reverse=True
+        ):
+            logger.info(
+                f"   {name:<16} {s.seconds:8.3f} сек {s.seconds / total:6.1%}  "
+                f"строк {s.rows:<7} запросов {s.queries}"
+            )
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    report = _active_report.get()
+    if report is not None and report._current is not None:
+        report._current.queries += 1
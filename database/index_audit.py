@@ -0,0 +1,264 @@
+"""
+Аудит индексов и регрессий планов горячих запросов.
+
+    python -m database.index_audit            # проверка текущей БД
+    python -m database.index_audit --seed     # сначала засеять 100k заведений
+
+Выполняет обработчики роутеров в транзакции с откатом, перехватывает все SQL
+(включая selectinload), делает EXPLAIN каждого и завершает процесс с кодом 1,
+если по «большой» таблице получился Seq Scan или у FK нет индекса.
+Засев предназначен только для отдельной, пустой тестовой БД.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import asyncio
+import argparse
+from datetime import datetime
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.database import engine
+from database.models import Booking, Member
+from database.partitions import add_months, month_start, create_booking_partitions
+from api.utils.logger import logger
+
+SEED_PLACES = 100_000
+
+# Таблицы, по которым Seq Scan в горячем пути — регрессия
+HOT_TABLES = {
+    "places",
+    "bookings",
+    "members",
+    "place_alternate_names",
+    "place_metro_stations",
+    "place_cuisines",
+    "place_features",
+    "place_visit_purposes",
+    "opening_hours",
+    "photos",
+    "menu_links",
+    "booking_links",
+    "reviews",
+}
+
+LOOKUPS = {
+    "alternate_names": ("place_alternate_names", "alternate_name_id"),
+    "metro_stations": ("place_metro_stations", "metro_station_id"),
+    "cuisines": ("place_cuisines", "cuisine_id"),
+    "features": ("place_features", "feature_id"),
+    "visit_purposes": ("place_visit_purposes", "visit_purpose_id"),
+}
+
+MISSING_FK_INDEXES_SQL = """
+SELECT c.conrelid::regclass::text AS table_name, a.attname AS column_name
+FROM pg_constraint c
+JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+WHERE c.contype = 'f'
+  AND c.connamespace = 'public'::regnamespace
+  AND NOT EXISTS (
+      SELECT 1 FROM pg_index i
+      WHERE i.indrelid = c.conrelid AND i.indkey[0] = c.conkey[1]
+  )
+  AND NOT EXISTS (SELECT 1 FROM pg_inherits inh WHERE inh.inhrelid = c.conrelid)
+ORDER BY 1, 2
+"""
+
+
+# ---------- засев ---------------------------------------------------------- #
+async def seed(conn, places: int = SEED_PLACES) -> None:
+    if await conn.scalar(text("SELECT EXISTS (SELECT 1 FROM places)")):
+        raise RuntimeError("places не пуста — засев только для пустой тестовой БД")
+
+    logger.info(f"🌱 Засев {places} заведений...")
+    await conn.execute(
+        text(
+            "INSERT INTO places (id, full_name, address, type, available_online, "
+            "search_text, source_url, source_domain) "
+            "SELECT gen_random_uuid(), 'Ресторан ' || g, 'ул. Тестовая, д. ' || g, "
+            "'Ресторан', g % 2 = 0, "
+            "'ресторан ' || g || ' ул. тестовая ' || md5(g::text), "
+            "'https://example.test/restaurant/' || g, 'example.test' "
+            "FROM generate_series(1, :n) g"
+        ),
+        {"n": places},
+    )
+    for lookup, (assoc, column) in LOOKUPS.items():
+        await conn.execute(
+            text(
+                f"INSERT INTO {lookup} (id, name) "
+                f"SELECT gen_random_uuid(), '{lookup} ' || g "
+                f"FROM generate_series(1, 50) g"
+            )
+        )
+        await conn.execute(
+            text(
+                f"INSERT INTO {assoc} (place_id, {column}) "
+                f"SELECT p.id, l.id FROM places p "
+                f"JOIN (SELECT id, row_number() OVER () - 1 AS rn FROM {lookup}) l "
+                f"ON l.rn IN (abs(hashtext(p.id::text)) % 50, "
+                f"abs(hashtext(p.id::text || '#')) % 50) "
+                f"ON CONFLICT DO NOTHING"
+            )
+        )
+
+    await conn.execute(
+        text(
+            "INSERT INTO opening_hours (id, day, hours, place_id) "
+            "SELECT gen_random_uuid(), d, '12:00 - 23:00', p.id FROM places p "
+            "CROSS JOIN unnest(ARRAY['ПН','ВТ','СР','ЧТ','ПТ','СБ','ВС']) d"
+        )
+    )
+    for table, copies in (("photos", 3), ("menu_links", 1), ("booking_links", 1)):
+        await conn.execute(
+            text(
+                f"INSERT INTO {table} (id, type, url, place_id) "
+                f"SELECT gen_random_uuid(), 'main', "
+                f"'https://example.test/' || p.id || '/' || g, p.id "
+                f"FROM places p CROSS JOIN generate_series(1, {copies}) g"
+            )
+        )
+    await conn.execute(
+        text(
+            "INSERT INTO reviews (id, author, date, rating, text, source, place_id) "
+            "SELECT gen_random_uuid(), 'Гость', '01.01.2025', 5, 'Отлично', "
+            "'leclick', p.id FROM places p CROSS JOIN generate_series(1, 2)"
+        )
+    )
+
+    current = month_start(datetime.utcnow().date())
+    await create_booking_partitions(
+        conn, add_months(current, -12), add_months(current, 3)
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO members (id, telegram_id, username, is_admin, is_superuser) "
+            "SELECT gen_random_uuid(), g, 'user' || g, false, false "
+            "FROM generate_series(1, 1000) g"
+        )
+    )
+    await conn.execute(
+        text(
+            "WITH m AS (SELECT array_agg(id) AS ids FROM members), "
+            "p AS (SELECT array_agg(id) AS ids FROM "
+            "      (SELECT id FROM places LIMIT 10000) x) "
+            "INSERT INTO bookings (id, user_id, place_id, booking_date, "
+            "num_of_people, status) "
+            "SELECT gen_random_uuid(), m.ids[1 + g % array_length(m.ids, 1)], "
+            "p.ids[1 + g % array_length(p.ids, 1)], "
+            "now() - interval '365 days' + (g * 3 % 648000) * interval '1 minute', "
+            "2, g % 3 FROM generate_series(1, 200000) g, m, p"
+        )
+    )
+    await conn.execute(text("ANALYZE"))
+    logger.info("🌱 Засев завершён")
+
+
+# ---------- EXPLAIN -------------------------------------------------------- #
+def _seq_scans(plan: dict) -> list[str]:
+    found = []
+    relation = plan.get("Relation Name", "")
+    base = "bookings" if relation.startswith("bookings_") else relation
+    if plan.get("Node Type") == "Seq Scan" and base in HOT_TABLES:
+        found.append(relation)
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def _run_hot_queries(session: AsyncSession, member, booking) -> None:
+    """Те же вызовы, что делают роутеры."""
+    from api.places import get_places
+    from api.bookings import get_all_bookings
+    from config import BOOKINGS_HISTORY_DAYS
+
+    search = dict(offset=0, similarity_threshold=0.0, db=session)
+    await get_places(name=None, limit=5, **search)
+    await get_places(name="ресторан 4242", limit=5, **search)
+    # опечатка: FTS ничего не находит, срабатывает similarity
+    await get_places(name="рестаран теставая", limit=6, **search)
+
+    await session.get(Member, member.id)
+    await session.execute(select(Member.phone).where(Member.id == member.id))
+    await get_all_bookings(
+        history_days=BOOKINGS_HISTORY_DAYS, db=session, current_user=member
+    )
+    if booking:
+        await session.execute(
+            select(Booking).where(
+                Booking.id == booking.id, Booking.booking_date == booking.booking_date
+            )
+        )
+
+
+async def audit(seed_places: int = 0) -> int:
+    problems = []
+    async with engine.connect() as conn:
+        if seed_places:
+            await seed(conn, seed_places)
+            await conn.commit()
+
+        missing = (await conn.execute(text(MISSING_FK_INDEXES_SQL))).all()
+        for table_name, column_name in missing:
+            problems.append(f"FK без индекса: {table_name}.{column_name}")
+
+        # образцы для запросов по ключу выбираем до перехвата
+        async with AsyncSession(bind=conn) as session:
+            member = (await session.execute(select(Member).limit(1))).scalar_one()
+            booking = (
+                await session.execute(
+                    select(Booking).where(Booking.user_id == member.id).limit(1)
+                )
+            ).scalar_one_or_none()
+
+        captured = []
+
+        def capture(conn_, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            async with AsyncSession(bind=conn) as session:
+                await _run_hot_queries(session, member, booking)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + statement, parameters
+            )
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            scans = _seq_scans(plan[0]["Plan"])
+            if scans:
+                problems.append(
+                    f"Seq Scan по {', '.join(sorted(set(scans)))}:\n    "
+                    + " ".join(statement.split())[:300]
+                )
+        await conn.rollback()
+
+    logger.info(f"🔍 Проверено запросов: {len(captured)}")
+    for problem in problems:
+        logger.error(f"❌ {problem}")
+    if not problems:
+        logger.info("✅ Регрессий планов и FK без индексов не найдено")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--seed",
+        nargs="?",
+        type=int,
+        const=SEED_PLACES,
+        default=0,
+        help="засеять пустую тестовую БД указанным числом заведений",
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(audit(args.seed)))
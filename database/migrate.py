@@ -0,0 +1,75 @@
+"""
+Применяет миграции схемы. Запускается один раз на релиз (отдельной задачей
+перед раскаткой воркеров), а не при старте каждого процесса:
+
+    python -m database.migrate
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.database import get_database_url, get_connect_args
+from database.schema import get_alembic_config, get_current_revision
+from api.utils.logger import logger
+
+BASELINE_REVISION = "0001"
+
+
+async def _inspect_database():
+    engine = create_async_engine(
+        get_database_url(), poolclass=NullPool, connect_args=get_connect_args()
+    )
+    try:
+        async with engine.connect() as conn:
+            revision = await get_current_revision(conn)
+            has_tables = await conn.scalar(
+                text("SELECT to_regclass('places') IS NOT NULL")
+            )
+    finally:
+        await engine.dispose()
+    return revision, has_tables
+
+
+async def _prepare_partitions(legacy: bool):
+    from database.database import engine
+    from database.partitions import (
+        convert_bookings_to_partitioned,
+        ensure_booking_partitions,
+    )
+
+    try:
+        if legacy:
+            await convert_bookings_to_partitioned()
+        await ensure_booking_partitions()
+    finally:
+        # пул привязан к циклу asyncio.run — не переносим соединения дальше
+        await engine.dispose()
+
+
+def migrate() -> None:
+    from alembic import command
+
+    config = get_alembic_config()
+    revision, has_tables = asyncio.run(_inspect_database())
+
+    # База, созданная раньше через create_all: приводим к baseline и помечаем
+    legacy = revision is None and has_tables
+    if legacy:
+        logger.info("🧾 Обнаружена схема без миграций, перевод на baseline")
+        asyncio.run(_prepare_partitions(legacy=True))
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, "head")
+    asyncio.run(_prepare_partitions(legacy=False))
+    logger.info("✅ Схема БД обновлена")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -11,6 +11,8 @@ from sqlalchemy import (
     Boolean,
     func,
     Text,
+    Index,
+    text,
 )
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.ext.asyncio import AsyncAttrs
@@ -33,13 +35,20 @@ class Member(Base):
 
 
 # For storing Bookings
+# Секционирована по booking_date (RANGE, по месяцам), см. database/partitions.py.
+# Ключ секционирования обязан входить в первичный ключ.
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # GET /bookings: выборка по пользователю в окне дат
+        Index("ix_bookings_user_id_booking_date", "user_id", "booking_date"),
+        {"postgresql_partition_by": "RANGE (booking_date)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("members.id"))
-    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"))
-    booking_date = Column(DateTime)
+    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"), index=True)
+    booking_date = Column(DateTime, primary_key=True)
     recording_date = Column(DateTime, server_default=func.now())
     num_of_people = Column(Integer)
     special_requests = Column(String)
@@ -50,64 +59,120 @@ class Booking(Base):
     place = relationship("Place")
 
 
-# Таблицы связи многие-ко-многим
+# Таблицы связи многие-ко-многим.
+# PK (place_id, X_id) обслуживает selectinload по place_id и не даёт дублей,
+# отдельный индекс по X_id — обратные связи и ON DELETE CASCADE справочника.
 place_alternate_names = Table(
     "place_alternate_names",
     Base.metadata,
-    Column("place_id", UUID(as_uuid=True), ForeignKey("places.id", ondelete="CASCADE")),
+    Column(
+        "place_id",
+        UUID(as_uuid=True),
+        ForeignKey("places.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
     Column(
         "alternate_name_id",
         UUID(as_uuid=True),
         ForeignKey("alternate_names.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
 )
 
 place_metro_stations = Table(
     "place_metro_stations",
     Base.metadata,
-    Column("place_id", UUID(as_uuid=True), ForeignKey("places.id", ondelete="CASCADE")),
+    Column(
+        "place_id",
+        UUID(as_uuid=True),
+        ForeignKey("places.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
     Column(
         "metro_station_id",
         UUID(as_uuid=True),
         ForeignKey("metro_stations.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
 )
 
 place_cuisines = Table(
     "place_cuisines",
     Base.metadata,
-    Column("place_id", UUID(as_uuid=True), ForeignKey("places.id", ondelete="CASCADE")),
     Column(
-        "cuisine_id", UUID(as_uuid=True), ForeignKey("cuisines.id", ondelete="CASCADE")
+        "place_id",
+        UUID(as_uuid=True),
+        ForeignKey("places.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "cuisine_id",
+        UUID(as_uuid=True),
+        ForeignKey("cuisines.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
 )
 
 place_features = Table(
     "place_features",
     Base.metadata,
-    Column("place_id", UUID(as_uuid=True), ForeignKey("places.id", ondelete="CASCADE")),
     Column(
-        "feature_id", UUID(as_uuid=True), ForeignKey("features.id", ondelete="CASCADE")
+        "place_id",
+        UUID(as_uuid=True),
+        ForeignKey("places.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "feature_id",
+        UUID(as_uuid=True),
+        ForeignKey("features.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
 )
 
 place_visit_purposes = Table(
     "place_visit_purposes",
     Base.metadata,
-    Column("place_id", UUID(as_uuid=True), ForeignKey("places.id", ondelete="CASCADE")),
+    Column(
+        "place_id",
+        UUID(as_uuid=True),
+        ForeignKey("places.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
     Column(
         "visit_purpose_id",
         UUID(as_uuid=True),
         ForeignKey("visit_purposes.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
 )
 
 
 class Place(AsyncAttrs, Base):
     __tablename__ = "places"
+    __table_args__ = (
+        # FTS в get_places: выражение должно совпадать с запросом
+        Index(
+            "ix_places_search_text_fts",
+            text("to_tsvector('russian', search_text)"),
+            postgresql_using="gin",
+        ),
+        # similarity / KNN-сортировка по <-> (pg_trgm)
+        Index(
+            "ix_places_search_text_trgm",
+            "search_text",
+            postgresql_using="gist",
+            postgresql_ops={"search_text": "gist_trgm_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    full_name = Column(String)
+    full_name = Column(String, index=True)
     phone = Column(String)
     address = Column(String)
     type = Column(String)
@@ -116,8 +181,12 @@ class Place(AsyncAttrs, Base):
     deposit_rules = Column(String)
     coordinates_lat = Column(Float)
     coordinates_lon = Column(Float)
-    source_url = Column(String)
+    # ключ дельта-импорта: заведение однозначно определяется страницей источника
+    source_url = Column(String, unique=True, index=True)
     source_domain = Column(String)
+    content_hash = Column(String(64))
+    last_seen_at = Column(DateTime)
+    is_available = Column(Boolean, default=True, server_default=text("true"))
 
     # Relationships
     alternate_names = relationship(
@@ -142,7 +211,7 @@ class Place(AsyncAttrs, Base):
     booking_links = relationship("BookingLink", back_populates="place")
     reviews = relationship("Review", back_populates="place")
     available_online = Column(Boolean, default=True)
-    search_text = Column(Text, nullable=True, index=True)
+    search_text = Column(Text, nullable=True)
 
     @property
     def name(self):
@@ -195,7 +264,7 @@ class OpeningHour(AsyncAttrs, Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     day = Column(String)
     hours = Column(String)
-    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"))
+    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"), index=True)
     place = relationship("Place", back_populates="opening_hours")
 
 
@@ -204,7 +273,7 @@ class Photo(AsyncAttrs, Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     type = Column(String)
     url = Column(String)
-    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"))
+    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"), index=True)
     place = relationship("Place", back_populates="photos")
 
 
@@ -213,7 +282,7 @@ class MenuLink(AsyncAttrs, Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     type = Column(String)
     url = Column(String)
-    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"))
+    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"), index=True)
     place = relationship("Place", back_populates="menu_links")
 
 
@@ -222,7 +291,7 @@ class BookingLink(AsyncAttrs, Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     type = Column(String)
     url = Column(String)
-    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"))
+    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"), index=True)
     place = relationship("Place", back_populates="booking_links")
 
 
@@ -234,5 +303,24 @@ class Review(AsyncAttrs, Base):
     rating = Column(Integer)
     text = Column(String)
     source = Column(String)
-    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"))
+    place_id = Column(UUID(as_uuid=True), ForeignKey("places.id"), index=True)
     place = relationship("Place", back_populates="reviews")
+
+
+# Кэш LLM-нормализации названий: повторный импорт платит только за новые места
+class PlaceNameCache(Base):
+    __tablename__ = "place_name_cache"
+    full_name = Column(String, primary_key=True)
+    address = Column(String, primary_key=True)
+    short_name = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+# Версия каталога: новая строка после каждого полного обновления заведений
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, server_default=func.now())
+    places_seen = Column(Integer, nullable=False, default=0)
+    places_removed = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,200 @@
+import re
+import time
+import random
+import asyncio
+from typing import Optional
+
+import aiohttp
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from database.models import PlaceNameCache
+from config import (
+    GROQ_TOKEN,
+    GROQ_API_URL,
+    GROQ_MODEL,
+    LLM_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT,
+)
+from api.utils.logger import logger
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value) -> Optional[float]:
+    """'2m59.5s' / '120ms' / '7' (Retry-After) -> секунды."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(num) * _DURATION_UNITS[unit] for num, unit in parts)
+
+
+def build_prompt(full_name: str, address: str) -> list[dict]:
+    return [
+        {
+            "role": "user",
+            "content": f"""
+
+Ты — система нормализации названий заведений.
+
+Название: "{full_name}"
+Адрес: "{address}"
+
+
+Верни только одно строковое значение в формате:
+<Короткое название> (ул. <название улицы>)
+""".strip(),
+        }
+    ]
+
+
+class RetryableLLMError(Exception):
+    pass
+
+
+class NameNormalizer:
+    """
+    Асинхронная нормализация названий через LLM:
+    ограниченный параллелизм, повторы с экспоненциальной задержкой и jitter,
+    общая пауза по Retry-After / x-ratelimit-* и кэш в таблице place_name_cache.
+    """
+
+    def __init__(
+        self,
+        url: str = GROQ_API_URL,
+        token: str = GROQ_TOKEN,
+        model: str = GROQ_MODEL,
+        concurrency: int = LLM_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+        timeout: float = LLM_TIMEOUT,
+    ):
+        self.url = url
+        self.token = token
+        self.model = model
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._paused_until = 0.0
+        self._http = None
+        self.requests = 0
+        self.cache_hits = 0
+        self.failures = 0
+
+    async def __aenter__(self):
+        self._http = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._http.close()
+
+    # ---------- кэш -------------------------------------------------------- #
+    async def normalize_many(self, session, keys) -> dict:
+        """(full_name, address) -> короткое имя; в LLM уходят только новые пары."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        rows = await session.execute(
+            select(
+                PlaceNameCache.full_name,
+                PlaceNameCache.address,
+                PlaceNameCache.short_name,
+            ).where(
+                tuple_(PlaceNameCache.full_name, PlaceNameCache.address).in_(keys)
+            )
+        )
+        names = {(full_name, address): short for full_name, address, short in rows}
+        self.cache_hits += len(names)
+
+        missing = [key for key in keys if key not in names]
+        results = await asyncio.gather(*(self.normalize(*key) for key in missing))
+
+        fresh = [
+            {"full_name": key[0], "address": key[1], "short_name": short}
+            for key, short in zip(missing, results)
+            if short is not None
+        ]
+        if fresh:
+            await session.execute(
+                pg_insert(PlaceNameCache).values(fresh).on_conflict_do_nothing()
+            )
+        for key, short in zip(missing, results):
+            # если LLM так и не ответила — оставляем исходное название
+            names[key] = short if short is not None else key[0]
+        return names
+
+    # ---------- LLM -------------------------------------------------------- #
+    async def normalize(self, full_name: str, address: str):
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._respect_pause()
+                try:
+                    return await self._request(full_name, address)
+                except (
+                    RetryableLLMError,
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                ) as e:
+                    # 4xx кроме 429 (ключ, модель, формат запроса) повтором не лечится
+                    rejected = isinstance(e, aiohttp.ClientResponseError) and (
+                        e.status < 500 and e.status != 429
+                    )
+                    if rejected or attempt == self.max_retries:
+                        self.failures += 1
+                        logger.warning(
+                            f"⚠️ LLM не нормализовала '{full_name}' "
+                            f"после {attempt + 1} попыток: {e}"
+                        )
+                        return None
+                    await asyncio.sleep(self._backoff(attempt))
+
+    async def _request(self, full_name: str, address: str) -> str:
+        payload = {
+            "model": self.model,
+            "messages": build_prompt(full_name, address),
+            "temperature": 0.7,
+            "max_tokens": 1024,
+            "top_p": 1,
+            "stream": False,
+        }
+        self.requests += 1
+        async with self._http.post(self.url, json=payload) as resp:
+            self._observe_rate_limit(resp)
+            if resp.status == 429 or resp.status >= 500:
+                raise RetryableLLMError(f"HTTP {resp.status}")
+            resp.raise_for_status()
+            data = await resp.json()
+        try:
+            return data["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError) as e:
+            raise RetryableLLMError(f"Некорректный ответ модели: {e}")
+
+    def _observe_rate_limit(self, resp) -> None:
+        """Все запросы ждут, если провайдер сообщил об исчерпании лимита."""
+        wait = None
+        if resp.status == 429:
+            wait = parse_duration(resp.headers.get("retry-after"))
+        elif resp.headers.get("x-ratelimit-remaining-requests") == "0":
+            wait = parse_duration(resp.headers.get("x-ratelimit-reset-requests"))
+        if wait:
+            self._paused_until = max(self._paused_until, time.monotonic() + wait)
+            logger.info(f"⏳ Лимит LLM, пауза {wait:.1f} сек")
+
+    async def _respect_pause(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(30.0, 0.5 * 2**attempt) * random.uniform(0.5, 1.5)
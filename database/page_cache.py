@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+from typing import Optional
+
+from api.utils.logger import logger
+
+MISSING = object()
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageCache:
+    """
+    Дисковый кэш страниц краулера.
+
+        root/meta/<sha256(url)>.json    — ETag, Last-Modified, хэш тела, кодировка
+        root/pages/<sha256(body)>       — тело страницы (content-addressed)
+        root/records/<sha256(url)>.json — хэш тела и результат его разбора
+
+    Разбор зависит и от URL (slug, базовый адрес), поэтому результат хранится
+    по URL вместе с хэшем тела: при том же теле разбор пропускается, даже если
+    сервер не поддерживает условные запросы. Тело, которое заменила новая
+    версия страницы, удаляется вместе со старыми метаданными.
+    Все записи атомарны (tmp -> os.replace): оборванный обход кэш не портит.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        for sub in ("meta", "pages", "records"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    def _path(self, kind: str, key: str, suffix: str = "") -> str:
+        return os.path.join(self.root, kind, key + suffix)
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # ---------- метаданные URL -------------------------------------------- #
+    def meta(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path("meta", sha256(url.encode()), ".json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_meta(self, url: str, **meta) -> None:
+        previous = self.meta(url)
+        meta["url"] = url
+        self._write(
+            self._path("meta", sha256(url.encode()), ".json"),
+            json.dumps(meta).encode(),
+        )
+        # старое тело больше не нужно; если оно было общим с другим URL,
+        # тот при 304 просто скачает страницу заново
+        if previous and previous.get("sha256") not in (None, meta.get("sha256")):
+            try:
+                os.remove(self._path("pages", previous["sha256"]))
+            except OSError:
+                pass
+
+    @staticmethod
+    def conditional_headers(meta: Optional[dict]) -> dict:
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    # ---------- тела и результаты разбора --------------------------------- #
+    def store_page(self, body: bytes) -> str:
+        digest = sha256(body)
+        path = self._path("pages", digest)
+        if not os.path.exists(path):
+            self._write(path, body)
+        return digest
+
+    def load_page(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._path("pages", digest), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def load_record(self, url: str, digest: str):
+        """
+        Результат разбора тела digest по этому URL (может быть None — страница
+        не распознана) или MISSING.
+        """
+        path = self._path("records", sha256(url.encode()), ".json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return MISSING
+        if not isinstance(cached, dict) or cached.get("sha256") != digest:
+            return MISSING
+        return cached["record"]
+
+    def save_record(self, url: str, digest: str, record: Optional[dict]) -> None:
+        self._write(
+            self._path("records", sha256(url.encode()), ".json"),
+            json.dumps(
+                {"sha256": digest, "record": record}, ensure_ascii=False
+            ).encode(),
+        )
+
+    def invalidate_records(self) -> None:
+        """После изменения RestaurantParser старые результаты разбора неверны."""
+        records = os.path.join(self.root, "records")
+        removed = 0
+        for name in os.listdir(records):
+            os.remove(os.path.join(records, name))
+            removed += 1
+        logger.info(f"🧹 Кэш разбора очищен: {removed} записей")
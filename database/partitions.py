@@ -0,0 +1,292 @@
+import re
+import sys
+import asyncio
+from datetime import date, datetime, time
+
+from sqlalchemy import text
+
+from database.database import engine
+from database.models import Booking
+from config import (
+    BOOKING_PARTITIONS_AHEAD,
+    BOOKING_ARCHIVE_AFTER_MONTHS,
+    BOOKING_ARCHIVE_SCHEMA,
+    BOOKING_ARCHIVE_TABLESPACE,
+)
+from api.utils.logger import logger
+
+PARENT_TABLE = Booking.__tablename__
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+# ---------- helpers -------------------------------------------------------- #
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, n: int) -> date:
+    years, month = divmod(d.month - 1 + n, 12)
+    return date(d.year + years, month + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def partition_month(name: str):
+    m = _PARTITION_RE.match(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+async def _attached_partitions(conn) -> list[str]:
+    res = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    return [row[0] for row in res]
+
+
+async def create_booking_partitions(conn, first: date, last: date) -> list[str]:
+    """
+    Создаёт месячные секции [first, last] и секцию по умолчанию.
+
+    В DEFAULT попадают брони за пределами горизонта секций; PostgreSQL не даст
+    создать секцию, пока в DEFAULT есть строки её диапазона. Поэтому DEFAULT на
+    время создания отсоединяется, строки нового месяца переносятся в его секцию,
+    и DEFAULT присоединяется обратно — всё в транзакции conn.
+    """
+    existing = set(await _attached_partitions(conn))
+    missing = []
+    month = month_start(first)
+    while month <= last:
+        if partition_name(month) not in existing:
+            missing.append(month)
+        month = add_months(month, 1)
+
+    has_default = DEFAULT_PARTITION in existing
+    if missing and has_default:
+        await conn.execute(
+            text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+        )
+
+    columns = ", ".join(c.name for c in Booking.__table__.columns)
+    created = []
+    for month in missing:
+        name = partition_name(month)
+        bounds = {
+            "start": datetime.combine(month, time()),
+            "end": datetime.combine(add_months(month, 1), time()),
+        }
+        await conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') "
+                f"TO ('{add_months(month, 1).isoformat()}')"
+            )
+        )
+        if has_default:
+            moved = await conn.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                    f"WHERE booking_date >= :start AND booking_date < :end "
+                    f"RETURNING {columns}) "
+                    f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+                ),
+                bounds,
+            )
+            if moved.rowcount:
+                logger.info(
+                    f"📦 {moved.rowcount} бронирований перенесено "
+                    f"из {DEFAULT_PARTITION} в {name}"
+                )
+        created.append(name)
+
+    if has_default:
+        if missing:
+            await conn.execute(
+                text(
+                    f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "
+                    f"{DEFAULT_PARTITION} DEFAULT"
+                )
+            )
+    else:
+        await conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+                f"PARTITION OF {PARENT_TABLE} DEFAULT"
+            )
+        )
+    return created
+
+
+# ---------- обслуживание -------------------------------------------------- #
+async def ensure_booking_partitions(months_ahead: int = BOOKING_PARTITIONS_AHEAD):
+    """Гарантирует наличие секций с текущего месяца на months_ahead вперёд."""
+    current = month_start(datetime.utcnow().date())
+    async with engine.begin() as conn:
+        created = await create_booking_partitions(
+            conn, current, add_months(current, months_ahead)
+        )
+    if created:
+        logger.info(f"🧱 Созданы секции бронирований: {', '.join(created)}")
+    return created
+
+
+async def archive_booking_partitions(
+    older_than_months: int = BOOKING_ARCHIVE_AFTER_MONTHS,
+):
+    """
+    Отсоединяет секции старше older_than_months и переносит их в архивную схему
+    (и, если задано, в отдельный tablespace). Данные остаются доступны
+    запросами к BOOKING_ARCHIVE_SCHEMA, но больше не участвуют в планах по bookings.
+    """
+    cutoff = add_months(month_start(datetime.utcnow().date()), -older_than_months)
+    archived = []
+    async with engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {BOOKING_ARCHIVE_SCHEMA}"))
+        for name in await _attached_partitions(conn):
+            month = partition_month(name)
+            if month is None or add_months(month, 1) > cutoff:
+                continue
+            await conn.execute(
+                text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+            )
+            await conn.execute(
+                text(f"ALTER TABLE {name} SET SCHEMA {BOOKING_ARCHIVE_SCHEMA}")
+            )
+            if BOOKING_ARCHIVE_TABLESPACE:
+                await conn.execute(
+                    text(
+                        f"ALTER TABLE {BOOKING_ARCHIVE_SCHEMA}.{name} "
+                        f"SET TABLESPACE {BOOKING_ARCHIVE_TABLESPACE}"
+                    )
+                )
+            archived.append(name)
+    if archived:
+        logger.info(f"🗄️ Секции перенесены в архив: {', '.join(archived)}")
+    return archived
+
+
+async def convert_bookings_to_partitioned() -> None:
+    """Разовый перенос существующей несекционированной таблицы bookings."""
+    async with engine.begin() as conn:
+        relkind = await conn.scalar(
+            text("SELECT relkind FROM pg_class WHERE relname = :t"),
+            {"t": PARENT_TABLE},
+        )
+        if relkind == "p":
+            logger.info("✅ bookings уже секционирована")
+            return
+
+        legacy = f"{PARENT_TABLE}_legacy"
+        await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {legacy}"))
+        # имена ограничений уникальны в схеме — освобождаем их для новой таблицы
+        constraints = await conn.execute(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = CAST(:t AS regclass)"
+            ),
+            {"t": legacy},
+        )
+        for (conname,) in constraints.all():
+            await conn.execute(
+                text(
+                    f"ALTER TABLE {legacy} RENAME CONSTRAINT {conname} "
+                    f"TO {conname.replace(PARENT_TABLE, legacy, 1)}"
+                )
+            )
+
+        await conn.run_sync(lambda c: Booking.__table__.create(c))
+
+        bounds = (
+            await conn.execute(
+                text(f"SELECT min(booking_date), max(booking_date) FROM {legacy}")
+            )
+        ).one()
+        current = month_start(datetime.utcnow().date())
+        first = month_start(bounds[0].date()) if bounds[0] else current
+        last = max(
+            month_start(bounds[1].date()) if bounds[1] else current,
+            add_months(current, BOOKING_PARTITIONS_AHEAD),
+        )
+        await create_booking_partitions(conn, first, last)
+
+        columns = ", ".join(c.name for c in Booking.__table__.columns)
+        moved = await conn.execute(
+            text(
+                f"INSERT INTO {PARENT_TABLE} ({columns}) "
+                f"SELECT {columns} FROM {legacy} WHERE booking_date IS NOT NULL"
+            )
+        )
+        await conn.execute(text(f"DROP TABLE {legacy}"))
+    logger.info(f"✅ bookings секционирована, перенесено строк: {moved.rowcount}")
+
+
+class _Rollback(Exception):
+    pass
+
+
+async def check_far_future_booking() -> int:
+    """
+    Проверка на живой БД в транзакции с откатом: бронь дальше горизонта секций
+    ложится в DEFAULT, а создание секции её месяца переносит бронь туда.
+    Возвращает код выхода (1 — секция не создалась или бронь осталась в DEFAULT).
+    """
+    current = month_start(datetime.utcnow().date())
+    far = add_months(current, BOOKING_PARTITIONS_AHEAD + 6)
+    booking_date = datetime(far.year, far.month, 15, 19, 30)
+    failed = 0
+    try:
+        async with engine.begin() as conn:
+            await create_booking_partitions(
+                conn, current, add_months(current, BOOKING_PARTITIONS_AHEAD)
+            )
+            booking_id = await conn.scalar(
+                text(
+                    f"INSERT INTO {PARENT_TABLE} (id, booking_date, num_of_people, "
+                    f"status) VALUES (gen_random_uuid(), :d, 2, 0) RETURNING id"
+                ),
+                {"d": booking_date},
+            )
+            where = {"id": booking_id, "d": booking_date}
+            located = text(
+                f"SELECT tableoid::regclass::text FROM {PARENT_TABLE} "
+                f"WHERE id = :id AND booking_date = :d"
+            )
+            before = await conn.scalar(located, where)
+            await create_booking_partitions(conn, current, far)
+            after = await conn.scalar(located, where)
+            if before != DEFAULT_PARTITION or after != partition_name(far):
+                logger.error(
+                    f"❌ Бронь на {booking_date:%Y-%m}: {before} -> {after}, "
+                    f"ожидалось {DEFAULT_PARTITION} -> {partition_name(far)}"
+                )
+                failed = 1
+            elif DEFAULT_PARTITION not in await _attached_partitions(conn):
+                logger.error(f"❌ {DEFAULT_PARTITION} не присоединена обратно")
+                failed = 1
+            else:
+                logger.info(f"✅ Бронь на {booking_date:%Y-%m} перенесена в {after}")
+            raise _Rollback
+    except _Rollback:
+        pass
+    return failed
+
+
+if __name__ == "__main__":
+    commands = {
+        "ensure": ensure_booking_partitions,
+        "archive": archive_booking_partitions,
+        "convert": convert_bookings_to_partitioned,
+        "check": check_far_future_booking,
+    }
+    command = sys.argv[1] if len(sys.argv) > 1 else "ensure"
+    result = asyncio.run(commands[command]())
+    if command == "check":
+        sys.exit(result)
@@ -0,0 +1,106 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from api.utils.metrics import (
+    Histogram,
+    render_series,
+    format_labels,
+    process_labels,
+)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.wait_seconds = Histogram()
+        self.overflow_events = 0
+        self.timeouts = 0
+
+
+# По пулу (метка db: primary / replica), общие на процесс: пул пересоздаётся
+# при engine.dispose(), метрики — нет
+_pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def metrics_for(db: str) -> PoolMetrics:
+    metrics = _pool_metrics.get(db)
+    if metrics is None:
+        metrics = _pool_metrics.setdefault(db, PoolMetrics())
+    return metrics
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий ожидание соединения и выход за pool_size."""
+
+    db = "primary"
+
+    def _do_get(self):
+        metrics = metrics_for(self.db)
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.wait_seconds.observe(time.perf_counter() - start)
+        if self._overflow > max(overflow_before, 0):
+            metrics.overflow_events += 1
+        return conn
+
+
+def instrumented_pool(db: str) -> type:
+    """Класс пула с меткой db; recreate() при dispose() сохраняет класс и метку."""
+    return type(f"InstrumentedPool_{db}", (InstrumentedPool,), {"db": db})
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    metrics = metrics_for(getattr(pool, "db", "primary"))
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "overflow_events": metrics.overflow_events,
+        "timeouts": metrics.timeouts,
+        "wait_seconds": metrics.wait_seconds.snapshot(),
+    }
+
+
+def pool_metric_lines(engines: dict) -> list[str]:
+    """Состояние пулов ({"primary": engine, ...}) в формате Prometheus."""
+    families = {
+        "db_pool_size": ("size", "gauge", "Размер пула соединений"),
+        "db_pool_checked_out": ("checked_out", "gauge", "Соединения, выданные из пула"),
+        "db_pool_checked_in": ("checked_in", "gauge", "Свободные соединения в пуле"),
+        "db_pool_overflow": ("overflow", "gauge", "Соединения сверх pool_size"),
+        "db_pool_overflow_events_total": (
+            "overflow_events",
+            "counter",
+            "Выдачи соединения сверх pool_size",
+        ),
+        "db_pool_timeouts_total": (
+            "timeouts",
+            "counter",
+            "Таймауты ожидания соединения",
+        ),
+    }
+    stats = {db: pool_stats(engine) for db, engine in engines.items() if engine}
+    process = process_labels()
+    lines = []
+    for name, (key, kind, help) in families.items():
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        lines += [
+            f"{name}{format_labels({**process, 'db': db})} {s[key]}"
+            for db, s in stats.items()
+        ]
+    name = "db_pool_wait_seconds"
+    lines += [f"# HELP {name} Ожидание соединения из пула", f"# TYPE {name} histogram"]
+    for db in stats:
+        lines += render_series(
+            name, "histogram", {**process, "db": db}, metrics_for(db).wait_seconds
+        )
+    return lines
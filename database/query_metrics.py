@@ -0,0 +1,91 @@
+import re
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from config import QUERY_SLOW_MS
+from api.utils.metrics import DB_QUERIES, DB_LATENCY
+from api.utils.logger import logger
+
+# учёт запросов текущего HTTP-запроса (QUERY_DEBUG); greenlet'ы SQLAlchemy
+# наследуют контекст задачи, поэтому запросы чужих обработчиков не смешиваются
+_request_queries: ContextVar = ContextVar("request_queries", default=None)
+
+# IN ($1, $2, ...) разной длины от selectinload — одна и та же форма запроса
+_PARAM_LIST_RE = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+
+
+class QueryStats:
+    """Запросы к БД в рамках одного HTTP-запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: dict[str, int] = {}
+
+    def record(self, statement: str, parameters, elapsed: float) -> None:
+        self.count += 1
+        self.seconds += elapsed
+        shape = _PARAM_LIST_RE.sub("$?", " ".join(statement.split()))
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        if elapsed * 1000 >= QUERY_SLOW_MS:
+            logger.warning(
+                f"🐢 Медленный запрос {elapsed * 1000:.1f} мс: "
+                f"{shape[:1000]} -- параметры {parameters!r:.500}"
+            )
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        return {s: n for s, n in self.shapes.items() if n >= threshold}
+
+
+def track_queries() -> tuple[QueryStats, object]:
+    """Начинает учёт запросов в текущем контексте: (stats, token для reset)."""
+    stats = QueryStats()
+    return stats, _request_queries.set(stats)
+
+
+def stop_tracking(token) -> None:
+    _request_queries.reset(token)
+
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:16].split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+def instrument_engine(engine, db: str) -> None:
+    """Число и время запросов к БД по типу (SELECT/INSERT/...) через события курсора."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = _operation(statement)
+        DB_LATENCY.labels(db, operation).observe(elapsed)
+        DB_QUERIES.labels(db, operation, "ok").inc()
+        stats = _request_queries.get()
+        if stats is not None:
+            stats.record(statement, parameters, elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        statement = exception_context.statement or ""
+        DB_LATENCY.labels(db, _operation(statement)).observe(elapsed)
+        DB_QUERIES.labels(db, _operation(statement), "error").inc()
+        stats = _request_queries.get()
+        if stats is not None:
+            stats.record(statement, exception_context.parameters, elapsed)
@@ -0,0 +1,373 @@
+import re
+from importlib.util import find_spec
+from urllib.parse import urlparse, unquote
+
+from bs4 import BeautifulSoup
+
+from api.utils.logger import logger
+
+# lxml разбирает страницу на порядок быстрее html.parser; без него — fallback
+DEFAULT_BACKEND = "lxml" if find_spec("lxml") else "html.parser"
+
+DAYS_MAP = {
+    "d0": "ВС",
+    "d1": "ПН",
+    "d2": "ВТ",
+    "d3": "СР",
+    "d4": "ЧТ",
+    "d5": "ПТ",
+    "d6": "СБ",
+}
+
+
+class RestaurantParser:
+    """
+    Разбор страницы ресторана LeClick.
+
+    Дерево обходится один раз: элементы раскладываются по классам и id,
+    геттеры берут из индекса узлы и ищут только внутри их поддеревьев.
+    """
+
+    def __init__(self, html, full_url, backend: str = DEFAULT_BACKEND):
+        self.soup = BeautifulSoup(html, backend)
+        self.full_url = full_url
+        self.base_url = f"{urlparse(full_url).scheme}://{urlparse(full_url).netloc}"
+        self._restaurant_id = ...
+        self._important_items = None
+        self._build_index()
+
+    # ---------- индекс ----------------------------------------------------- #
+    def _build_index(self):
+        self.by_class = {}
+        self.by_id = {}
+        self.typed_links = []  # a[type]
+        self.day_items = []  # [class^="item d"]
+        self.legacy_id_divs = []  # div[data-restaurant-id]
+        for el in self.soup.find_all(True):
+            attrs = el.attrs
+            classes = attrs.get("class")
+            if classes:
+                for cls in classes:
+                    self.by_class.setdefault(cls, []).append(el)
+                if " ".join(classes).startswith("item d"):
+                    self.day_items.append(el)
+            if "id" in attrs:
+                self.by_id.setdefault(attrs["id"], el)
+            if el.name == "a" and "type" in attrs:
+                self.typed_links.append(el)
+            elif el.name == "div" and "data-restaurant-id" in attrs:
+                self.legacy_id_divs.append(el)
+
+    def _first(self, cls, name=None):
+        for el in self.by_class.get(cls, ()):
+            if name is None or el.name == name:
+                return el
+        return None
+
+    def _select_first(self, cls, selector):
+        """Аналог select_one(".cls selector")."""
+        for outer in self.by_class.get(cls, ()):
+            found = outer.select_one(selector)
+            if found is not None:
+                return found
+        return None
+
+    def _select_all(self, cls, selector):
+        """Аналог select(".cls selector") без повторов."""
+        seen, found = set(), []
+        for outer in self.by_class.get(cls, ()):
+            for el in outer.select(selector):
+                if id(el) not in seen:
+                    seen.add(id(el))
+                    found.append(el)
+        return found
+
+    def _important_block(self, label):
+        """div.items блока importantInfo по подписи ("Средний чек:" и т.п.)."""
+        if self._important_items is None:
+            self._important_items = {}
+            info = self._first("importantInfo", "div")
+            if info is not None:
+                for span in info.find_all("span"):
+                    if span.string is not None:
+                        self._important_items.setdefault(
+                            str(span.string), span.find_parent("div", class_="items")
+                        )
+        return self._important_items.get(label)
+
+    def get_restaurant_id(self):
+        if self._restaurant_id is not ...:
+            return self._restaurant_id
+        try:
+            fav_block = self._first("rest-fav-bl", "div")
+            if fav_block and fav_block.has_attr("data-id"):
+                self._restaurant_id = fav_block["data-id"]
+            else:
+                legacy_div = self.legacy_id_divs[0] if self.legacy_id_divs else None
+                self._restaurant_id = (
+                    legacy_div["data-restaurant-id"] if legacy_div else None
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось получить ID ресторана: {e}")
+            return None
+        return self._restaurant_id
+
+    def get_names(self):
+        names = {"main": None, "alternate": []}
+        try:
+            url_path = urlparse(self.full_url).path
+            if "/restaurant/" in url_path:
+                slug = unquote(url_path.split("/restaurant/")[-1].split("/")[0])
+                name_from_url = " ".join(
+                    part.capitalize() for part in slug.replace("-", " ").split()
+                )
+                names["alternate"].append(name_from_url)
+
+            alternate_name_span = self._first("rest-card__fav-icon", "span")
+            if alternate_name_span and "data-name" in alternate_name_span.attrs:
+                names["alternate"].append(alternate_name_span["data-name"].strip())
+
+            title_text = self._select_first("restTitle", "h1")
+            if title_text:
+                title_parts = title_text.text.strip().split("/")
+                names["main"] = title_parts[0].strip()
+                if len(title_parts) > 1:
+                    names["alternate"].extend(
+                        [p.strip() for p in title_parts[1:] if p.strip()]
+                    )
+
+            # порядок детерминирован: от него зависит хэш записи при импорте
+            names["alternate"] = list(
+                dict.fromkeys(
+                    name
+                    for name in names["alternate"]
+                    if name and name != names["main"]
+                )
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка при разборе имен: {e}")
+        return names
+
+    def get_phone(self):
+        try:
+            return self._first("phone-click").text.strip()
+        except AttributeError:
+            return None
+
+    def get_address(self):
+        try:
+            return self._select_first("address", ".address").text.strip()
+        except AttributeError:
+            return None
+
+    def get_metro(self):
+        try:
+            return [
+                m.strip()
+                for m in self._first("metro").text.strip().split(",")
+            ]
+        except AttributeError:
+            return []
+
+    def get_type(self):
+        try:
+            return self._first("restType").text.strip()
+        except AttributeError:
+            return None
+
+    def get_average_check(self):
+        try:
+            check_block = self._important_block("Средний чек:")
+            check_text = check_block.get_text(strip=True).replace(
+                "Средний чек:", ""
+            )
+            if "—" in check_text or "-" in check_text:
+                return check_text.replace("—", "-").strip()
+            return int(re.sub(r"\D", "", check_text))
+        except (AttributeError, ValueError, TypeError):
+            return None
+
+    def get_cuisines(self):
+        try:
+            return [a.text.strip() for a in self._select_all("kitchen", "a")]
+        except AttributeError:
+            return []
+
+    def get_opening_hours(self):
+        hours = {}
+        for day in self.day_items:
+            class_name = [c for c in day["class"] if c.startswith("d")][0]
+            time_from = day.select_one(".timeFrom")
+            time_to = day.select_one(".timeTo")
+            hours[DAYS_MAP[class_name]] = (
+                f"{time_from.text.strip()} - {time_to.text.strip()}"
+                if time_from and time_to
+                else "весь день"
+            )
+        return hours
+
+    def get_menu_links(self):
+        menus = {}
+        try:
+            for link in self.by_class.get("goToMenu", ()):
+                menu_type = link.text.strip()
+                menus[menu_type] = link["href"]
+        except AttributeError:
+            pass
+        return menus
+
+    def get_photos(self):
+        photos = {"interior": [], "food": [], "facade": []}
+        for a in self.typed_links:
+            photo_type = a["type"]
+            if photo_type in photos:
+                photos[photo_type].append(a["href"])
+        return photos
+
+    def get_coordinates(self):
+        try:
+            map_element = self._first("mapAction")
+            return {
+                "lat": float(map_element["data-lat"]),
+                "lon": float(map_element["data-long"]),
+            }
+        except (AttributeError, KeyError):
+            return None
+
+    def get_booking_links(self):
+        booking_links = {}
+        restraunt_id = self.get_restaurant_id()
+        try:
+            main = next(
+                (
+                    a
+                    for el in self.by_class.get("mainBooking", ())
+                    if "bookingBtn" in el["class"]
+                    for a in [el.find("a")]
+                    if a is not None
+                ),
+                None,
+            )
+            if main:
+                booking_links["main"] = (
+                    f"https://leclick.ru/restaurants/partner-reserve/id/"
+                    f"{restraunt_id}/from/website?lang=ru"
+                )
+            banquet = self._select_first("bookingBtn", 'a[href*="banquet=1"]')
+            if banquet:
+                booking_links["banquet"] = (
+                    f"https://leclick.ru/restaurants/partner-reserve/id/"
+                    f"{restraunt_id}/from/website?banquet=1&lang=ru"
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка получения ссылок бронирования: {e}")
+        return booking_links
+
+    def get_deposit_rules(self):
+        try:
+            return (
+                self._select_first("depositRulesText", "pre")
+                .text.strip()
+                .replace("\n", " ")
+            )
+        except AttributeError:
+            return None
+
+    def get_visit_purposes(self):
+        try:
+            block = self._important_block("Цель посещения:")
+            return [a.text.strip() for a in block.select("a")]
+        except AttributeError:
+            return []
+
+    def get_features(self):
+        try:
+            block = self._important_block("Особенности:")
+            return [
+                a.text.strip()
+                for a in block.select("a:not(.hidden)")
+                if a.text.strip()
+            ]
+        except AttributeError:
+            return []
+
+    def get_reviews(self):
+        reviews = []
+        try:
+            for review in self._select_all("feedback", ".item"):
+                reviews.append(
+                    {
+                        "author": review.select_one(".name").text.strip(),
+                        "date": review.select_one(".date").text.strip(),
+                        "rating": len(review.select(".material-icons:not(.md-18)")),
+                        "text": (
+                            review.select_one(".review").text.strip()
+                            if review.select_one(".review")
+                            else None
+                        ),
+                        "source": (
+                            review.select_one(".partner").text.strip()
+                            if review.select_one(".partner")
+                            else None
+                        ),
+                    }
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка при разборе отзывов: {e}")
+        return reviews
+
+    def get_full_description(self):
+        try:
+            return (
+                self.by_id.get("allDescr")
+                or self.by_id.get("shortDescr")
+                or self._select_first("description", ".text")
+            ).text.strip()
+        except AttributeError:
+            return None
+
+    def parse(self):
+        try:
+            names = self.get_names()
+            full_name = names.get("main")
+            address = self.get_address()
+
+            if not full_name or not address:
+                logger.warning(
+                    f"⚠️ Пропуск ресторана: нет имени или адреса — {self.full_url}"
+                )
+                return None
+
+            return {
+                "full_name": full_name,
+                "alternate_name": names.get("alternate", []),
+                "phone": self.get_phone() or None,
+                "address": address,
+                "close_metro": self.get_metro() or [],
+                "type": self.get_type() or None,
+                "average_check": self.get_average_check() or None,
+                "main_cuisine": self.get_cuisines() or [],
+                "opening_hours": self.get_opening_hours() or {},
+                "menu_links": self.get_menu_links() or {},
+                "photos": self.get_photos()
+                or {"interior": [], "food": [], "facade": []},
+                "coordinates": self.get_coordinates() or None,
+                "features": self.get_features() or [],
+                "booking_links": self.get_booking_links() or {},
+                "deposit_rules": self.get_deposit_rules() or None,
+                "visit_purposes": self.get_visit_purposes() or [],
+                "reviews": self.get_reviews() or [],
+                "description": self.get_full_description() or None,
+            }
+
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка при парсинге {self.full_url}: {e}")
+            return None
+
+
+def parse_page(html: str, url: str, backend: str = DEFAULT_BACKEND):
+    """Запись для restaurants.jsonl или None, если страница не распознана."""
+    data = RestaurantParser(html, url, backend).parse()
+    if data is not None:
+        data["source"] = {"url": url, "domain": urlparse(url).netloc}
+    return data
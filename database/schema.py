@@ -0,0 +1,50 @@
+import os
+
+from sqlalchemy import text
+
+from api.utils.logger import logger
+
+ALEMBIC_INI = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini"
+)
+
+
+def get_alembic_config():
+    from alembic.config import Config
+
+    return Config(ALEMBIC_INI)
+
+
+def get_script_directory():
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(get_alembic_config())
+
+
+async def get_current_revision(conn):
+    exists = await conn.scalar(text("SELECT to_regclass('alembic_version') IS NOT NULL"))
+    if not exists:
+        return None
+    return await conn.scalar(text("SELECT version_num FROM alembic_version"))
+
+
+async def check_schema_version(engine) -> None:
+    """
+    Дешёвая проверка при старте: схема БД должна быть на head-ревизии.
+    Миграции применяет только python -m database.migrate.
+    """
+    script = get_script_directory()
+    head = script.get_current_head()
+    async with engine.connect() as conn:
+        current = await get_current_revision(conn)
+
+    if current == head:
+        return
+    known = {rev.revision for rev in script.walk_revisions()}
+    if current in known or current is None:
+        raise RuntimeError(
+            f"Схема БД на ревизии {current}, ожидается {head}: "
+            "выполните python -m database.migrate"
+        )
+    # БД новее кода (например, во время отката релиза) — работаем дальше
+    logger.warning(f"⚠️ Неизвестная ревизия схемы {current} (код ожидает {head})")
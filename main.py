@@ -1,21 +1,46 @@
 import os
-import platform
+import asyncio
+
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
-from database.database import engine, Base
+from database.database import engine, replica_engine
+from database.pool_metrics import pool_stats, pool_metric_lines
+from database.schema import check_schema_version
+from database.catalog_snapshot import keep_snapshot_fresh
 from api.bookings import router as bookings_router
 from api.places import router as places_router
 from api.login import router as login_router
-from config import uvicorn_host
-from database.models import *
-from api.utils.logger import logger
+from api.profiles import router as profiles_router
+from config import (
+    uvicorn_host,
+    WEB_CONCURRENCY,
+    QUERY_DEBUG,
+    PROFILE_TOKEN,
+    PROFILE_SAMPLE_RATE,
+)
+from api.utils.logger import logger, RequestIdMiddleware
+from api.utils.auth_tools import member_cache
+from api.utils.metrics import MetricsMiddleware, registry
+from api.utils.query_debug import QueryDebugMiddleware
+from api.utils.profiler import ProfilerMiddleware
 
 app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+if QUERY_DEBUG:
+    app.add_middleware(QueryDebugMiddleware)
+if PROFILE_TOKEN or PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilerMiddleware)
+app.add_middleware(RequestIdMiddleware)
+registry.collector(
+    lambda: pool_metric_lines({"primary": engine, "replica": replica_engine})
+)
 
 app.include_router(places_router, prefix="/api")
 app.include_router(bookings_router, prefix="/api")
 app.include_router(login_router, prefix="/api")
+app.include_router(profiles_router)
 
 
 @app.get("/")
@@ -23,16 +48,40 @@ async def root():
     return {"message": "Hello, World!"}
 
 
+@app.get("/stats")
+async def stats():
+    # у каждого воркера uvicorn свои кэш и пул: ответ — по обслужившему процессу
+    return {
+        "pid": os.getpid(),
+        "member_cache": member_cache.stats(),
+        "db_pool": pool_stats(engine),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.on_event("startup")
 async def startup():
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("✅ Таблицы успешно созданы.")
+        await check_schema_version(engine)
+        logger.info("✅ Схема БД актуальна.")
     except Exception as e:
-        logger.error(f"❌ Ошибка при создании таблиц: {e}")
+        logger.error("❌ Ошибка проверки схемы БД: %s", e)
         raise
+    # снимок каталога: собирает один воркер, остальные отображают готовый файл
+    app.state.snapshot_task = asyncio.create_task(keep_snapshot_fresh())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.snapshot_task.cancel()
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host=uvicorn_host, port=8000)
+    # несколько воркеров — только по строке импорта: каждый процесс импортирует app
+    uvicorn.run("main:app", host=uvicorn_host, port=8000, workers=WEB_CONCURRENCY)
@@ -0,0 +1,152 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+LOOKUP_TABLES = (
+    "alternate_names",
+    "metro_stations",
+    "cuisines",
+    "features",
+    "visit_purposes",
+)
+
+# таблица связи -> (колонка, справочник)
+ASSOCIATION_TABLES = {
+    "place_alternate_names": ("alternate_name_id", "alternate_names"),
+    "place_metro_stations": ("metro_station_id", "metro_stations"),
+    "place_cuisines": ("cuisine_id", "cuisines"),
+    "place_features": ("feature_id", "features"),
+    "place_visit_purposes": ("visit_purpose_id", "visit_purposes"),
+}
+
+
+def _id():
+    return sa.Column("id", UUID(as_uuid=True), primary_key=True)
+
+
+def _place_fk():
+    return sa.Column("place_id", UUID(as_uuid=True), sa.ForeignKey("places.id"))
+
+
+def upgrade() -> None:
+    # similarity() в get_places
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        "members",
+        _id(),
+        sa.Column("telegram_id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(255), nullable=True),
+        sa.Column("first_name", sa.String(255), nullable=True),
+        sa.Column("phone", sa.String(20), nullable=True),
+        sa.Column("is_admin", sa.Boolean()),
+        sa.Column("is_superuser", sa.Boolean()),
+    )
+    op.create_index("ix_members_telegram_id", "members", ["telegram_id"], unique=True)
+
+    op.create_table(
+        "places",
+        _id(),
+        sa.Column("full_name", sa.String()),
+        sa.Column("phone", sa.String()),
+        sa.Column("address", sa.String()),
+        sa.Column("type", sa.String()),
+        sa.Column("average_check", sa.String()),
+        sa.Column("description", sa.String()),
+        sa.Column("deposit_rules", sa.String()),
+        sa.Column("coordinates_lat", sa.Float()),
+        sa.Column("coordinates_lon", sa.Float()),
+        sa.Column("source_url", sa.String()),
+        sa.Column("source_domain", sa.String()),
+        sa.Column("available_online", sa.Boolean()),
+        sa.Column("search_text", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_places_search_text", "places", ["search_text"])
+
+    for table in LOOKUP_TABLES:
+        op.create_table(
+            table,
+            _id(),
+            sa.Column("name", sa.String()),
+            sa.UniqueConstraint("name"),
+        )
+
+    for table, (column, target) in ASSOCIATION_TABLES.items():
+        op.create_table(
+            table,
+            sa.Column(
+                "place_id",
+                UUID(as_uuid=True),
+                sa.ForeignKey("places.id", ondelete="CASCADE"),
+            ),
+            sa.Column(
+                column,
+                UUID(as_uuid=True),
+                sa.ForeignKey(f"{target}.id", ondelete="CASCADE"),
+            ),
+        )
+
+    op.create_table(
+        "opening_hours",
+        _id(),
+        sa.Column("day", sa.String()),
+        sa.Column("hours", sa.String()),
+        _place_fk(),
+    )
+    for table in ("photos", "menu_links", "booking_links"):
+        op.create_table(
+            table,
+            _id(),
+            sa.Column("type", sa.String()),
+            sa.Column("url", sa.String()),
+            _place_fk(),
+        )
+    op.create_table(
+        "reviews",
+        _id(),
+        sa.Column("author", sa.String()),
+        sa.Column("date", sa.String()),
+        sa.Column("rating", sa.Integer()),
+        sa.Column("text", sa.String()),
+        sa.Column("source", sa.String()),
+        _place_fk(),
+    )
+
+    # секции создаёт database.partitions (python -m database.migrate / beat)
+    op.create_table(
+        "bookings",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("members.id")),
+        sa.Column("place_id", UUID(as_uuid=True), sa.ForeignKey("places.id")),
+        sa.Column("booking_date", sa.DateTime(), primary_key=True),
+        sa.Column("recording_date", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("num_of_people", sa.Integer()),
+        sa.Column("special_requests", sa.String()),
+        sa.Column("status", sa.Integer()),
+        postgresql_partition_by="RANGE (booking_date)",
+    )
+    op.execute("CREATE TABLE IF NOT EXISTS bookings_default PARTITION OF bookings DEFAULT")
+
+
+def downgrade() -> None:
+    op.drop_table("bookings")
+    for table in ("reviews", "booking_links", "menu_links", "photos", "opening_hours"):
+        op.drop_table(table)
+    for table in ASSOCIATION_TABLES:
+        op.drop_table(table)
+    for table in LOOKUP_TABLES:
+        op.drop_table(table)
+    op.drop_table("places")
+    op.drop_index("ix_members_telegram_id", table_name="members")
+    op.drop_table("members")
@@ -0,0 +1,79 @@
+"""indexes for FK columns, association tables and place search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# таблица связи -> колонка справочника
+ASSOCIATION_TABLES = {
+    "place_alternate_names": "alternate_name_id",
+    "place_metro_stations": "metro_station_id",
+    "place_cuisines": "cuisine_id",
+    "place_features": "feature_id",
+    "place_visit_purposes": "visit_purpose_id",
+}
+
+CHILD_TABLES = ("opening_hours", "photos", "menu_links", "booking_links", "reviews")
+
+
+def upgrade() -> None:
+    for table, column in ASSOCIATION_TABLES.items():
+        # PK невозможен при NULL и дублях, которые мог оставить старый импорт
+        op.execute(f"DELETE FROM {table} WHERE place_id IS NULL OR {column} IS NULL")
+        op.execute(
+            f"DELETE FROM {table} a USING {table} b "
+            f"WHERE a.ctid < b.ctid AND a.place_id = b.place_id "
+            f"AND a.{column} = b.{column}"
+        )
+        op.create_primary_key(f"{table}_pkey", table, ["place_id", column])
+        op.create_index(f"ix_{table}_{column}", table, [column])
+
+    for table in CHILD_TABLES:
+        op.create_index(f"ix_{table}_place_id", table, ["place_id"])
+
+    # IF NOT EXISTS: database.partitions.convert_bookings_to_partitioned
+    # создаёт bookings уже по текущей модели
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_bookings_place_id ON bookings (place_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_bookings_user_id_booking_date "
+        "ON bookings (user_id, booking_date)"
+    )
+
+    # B-tree по длинному search_text бесполезен для FTS/similarity
+    # и падает на строках длиннее ~2.7 КБ
+    op.drop_index("ix_places_search_text", table_name="places")
+    op.create_index("ix_places_full_name", "places", ["full_name"])
+    op.execute(
+        "CREATE INDEX ix_places_search_text_fts ON places "
+        "USING gin (to_tsvector('russian', search_text))"
+    )
+    op.execute(
+        "CREATE INDEX ix_places_search_text_trgm ON places "
+        "USING gist (search_text gist_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_places_search_text_trgm", table_name="places")
+    op.drop_index("ix_places_search_text_fts", table_name="places")
+    op.drop_index("ix_places_full_name", table_name="places")
+    op.create_index("ix_places_search_text", "places", ["search_text"])
+
+    op.drop_index("ix_bookings_user_id_booking_date", table_name="bookings")
+    op.drop_index("ix_bookings_place_id", table_name="bookings")
+
+    for table in CHILD_TABLES:
+        op.drop_index(f"ix_{table}_place_id", table_name=table)
+
+    for table, column in ASSOCIATION_TABLES.items():
+        op.drop_index(f"ix_{table}_{column}", table_name=table)
+        op.drop_constraint(f"{table}_pkey", table, type_="primary")
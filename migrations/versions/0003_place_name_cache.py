@@ -0,0 +1,27 @@
+"""persistent cache of LLM-normalized place names
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "place_name_cache",
+        sa.Column("full_name", sa.String(), primary_key=True),
+        sa.Column("address", sa.String(), primary_key=True),
+        sa.Column("short_name", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("place_name_cache")
@@ -0,0 +1,50 @@
+"""delta import: unique source_url, content hash, availability
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+CHILD_TABLES = ("opening_hours", "photos", "menu_links", "booking_links", "reviews")
+
+
+def upgrade() -> None:
+    # Старый импорт создавал дубликаты одной страницы: оставляем по одному
+    # заведению на source_url, брони переносим на оставшееся
+    op.execute(
+        "CREATE TEMP TABLE place_dups ON COMMIT DROP AS "
+        "SELECT id, first_value(id) OVER (PARTITION BY source_url ORDER BY id) "
+        "AS keep_id FROM places WHERE source_url IS NOT NULL"
+    )
+    op.execute("DELETE FROM place_dups WHERE id = keep_id")
+    op.execute(
+        "UPDATE bookings b SET place_id = d.keep_id "
+        "FROM place_dups d WHERE b.place_id = d.id"
+    )
+    for table in CHILD_TABLES:
+        op.execute(
+            f"DELETE FROM {table} WHERE place_id IN (SELECT id FROM place_dups)"
+        )
+    op.execute("DELETE FROM places WHERE id IN (SELECT id FROM place_dups)")
+
+    op.create_index("ix_places_source_url", "places", ["source_url"], unique=True)
+    op.add_column("places", sa.Column("content_hash", sa.String(64)))
+    op.add_column("places", sa.Column("last_seen_at", sa.DateTime()))
+    op.add_column(
+        "places",
+        sa.Column("is_available", sa.Boolean(), server_default=sa.text("true")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("places", "is_available")
+    op.drop_column("places", "last_seen_at")
+    op.drop_column("places", "content_hash")
+    op.drop_index("ix_places_source_url", table_name="places")
@@ -1,19 +1,188 @@
+import os
 import asyncio
+from datetime import datetime
+
+from celery import chord
+from celery.signals import (
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
+
 from celery_app import celery_app
-from database.import_data import import_from_json
-from database.parser_for_new_db import parse_for_db
+from config import CATALOG_CHUNK_SIZE, CRAWL_CACHE_DIR
+from database.database import engine, replica_engine
+from database.partitions import ensure_booking_partitions, archive_booking_partitions
 from api.utils.logger import logger
 
 
+# ---------- async-среда воркера ------------------------------------------ #
+# Один event loop на процесс воркера: пул engine привязан к циклу, в котором
+# открыты соединения, и с общим циклом переиспользуется между задачами.
+_loop = None
+
+
+def _worker_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    # соединения родителя после fork не наши — забываем их, не закрывая
+    engine.sync_engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.sync_engine.dispose(close=False)
+    _worker_loop()
+    logger.info(f"🔁 Worker process {os.getpid()}: event loop ready")
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    global _loop
+    if _loop is None or _loop.is_closed():
+        return
+    try:
+        _loop.run_until_complete(engine.dispose())
+        if replica_engine is not None:
+            _loop.run_until_complete(replica_engine.dispose())
+        _loop.run_until_complete(_loop.shutdown_asyncgens())
+    finally:
+        _loop.close()
+        _loop = None
+
+
+def run_async(coro):
+    """Выполняет корутину задачи в event loop процесса воркера."""
+    return _worker_loop().run_until_complete(coro)
+
+
 @celery_app.task
 def parse_places_task():
+    # стек краулера (aiohttp, bs4, lxml, selenium) грузится только в задачах обхода
+    from database.parser_for_new_db import parse_for_db
+
     logger.info("🛠️  Starting parse...")
-    parse_for_db()
+    # воркеры Celery — daemon-процессы, пул процессов для разбора им недоступен
+    parse_for_db(parse_workers=0)
     logger.info("✅ Parsing done")
 
 
 @celery_app.task
-def import_places_task(filename: str):
+def import_places_task(filename: str, dry_run: bool = False):
+    from database.import_data import import_from_json
+
     logger.info(f"📥 Starting import from {filename}...")
-    asyncio.run(import_from_json(filename))
+    report = run_async(import_from_json(filename, dry_run=dry_run))
     logger.info("✅ Import done")
+    return report.as_dict()
+
+
+# ---------- обновление каталога: discover -> chunks -> finalize ----------- #
+async def _discover() -> list[str]:
+    from database.crawler import Crawler
+    from database.discovery import discover_links
+    from database.import_data import discovery_floor
+
+    found = {}
+    min_links = await discovery_floor()
+    # воркеры Celery — daemon-процессы, пул процессов для разбора им недоступен
+    async with Crawler(parse_workers=0) as crawler:
+        await discover_links(
+            crawler,
+            lambda links: found.update(dict.fromkeys(links)),
+            min_links=min_links,
+        )
+    return list(found)
+
+
+async def _crawl_chunk(urls: list[str]) -> dict:
+    from database.crawler import Crawler
+    from database.page_cache import PageCache
+
+    results = []
+    cache = PageCache(CRAWL_CACHE_DIR) if CRAWL_CACHE_DIR else None
+    async with Crawler(cache=cache, parse_workers=0) as crawler:
+        await crawler.run(urls, results.append)
+    return {
+        "records": [r.record for r in results if r.record is not None],
+        # только временные сбои: 404/410 ("gone") скрываются на финальном шаге
+        "failed": [r.url for r in results if r.status == "failed"],
+    }
+
+
+@celery_app.task
+def refresh_catalog_task(chunk_size: int = CATALOG_CHUNK_SIZE):
+    """
+    Полное обновление каталога одним workflow: ссылки собираются здесь, пачки
+    ссылок параллельно скачиваются, разбираются и импортируются на всех воркерах
+    (chain crawl -> import на пачку), а chord по завершении всех пачек вызывает
+    finalize. Нужен result backend (CELERY_RESULT_BACKEND).
+    """
+    started_at = datetime.utcnow().isoformat()
+    logger.info("🔎 Catalog refresh: discovering links...")
+    urls = run_async(_discover())
+    if not urls:
+        # без ссылок finalize скрыл бы весь каталог
+        raise RuntimeError("Catalog refresh: no restaurant links discovered")
+
+    chunks = [urls[i : i + chunk_size] for i in range(0, len(urls), chunk_size)]
+    pipelines = [
+        crawl_chunk_task.s(chunk) | import_chunk_task.s(started_at) for chunk in chunks
+    ]
+    chord(pipelines, finalize_catalog_task.s(started_at)).apply_async()
+    logger.info(f"🚚 Catalog refresh: {len(urls)} links in {len(chunks)} chunks")
+    return {"urls": len(urls), "chunks": len(chunks), "started_at": started_at}
+
+
+@celery_app.task(autoretry_for=(Exception,), max_retries=2, retry_backoff=True)
+def crawl_chunk_task(urls: list[str]):
+    crawled = run_async(_crawl_chunk(urls))
+    logger.info(
+        f"🕷️ Chunk crawled: {len(crawled['records'])} records, "
+        f"{len(crawled['failed'])} failed"
+    )
+    return crawled
+
+
+@celery_app.task(autoretry_for=(Exception,), max_retries=2, retry_backoff=True)
+def import_chunk_task(crawled: dict, started_at: str):
+    from database.import_data import import_chunk
+
+    report = run_async(
+        import_chunk(
+            crawled["records"], datetime.fromisoformat(started_at), crawled["failed"]
+        )
+    )
+    return report["counters"]
+
+
+@celery_app.task
+def finalize_catalog_task(results: list[dict], started_at: str):
+    from database.import_data import finalize_catalog
+
+    totals = {}
+    for counters in results:
+        for key, value in counters.items():
+            totals[key] = totals.get(key, 0) + value
+    version = run_async(
+        finalize_catalog(datetime.fromisoformat(started_at), totals["seen"])
+    )
+    logger.info(f"✅ Catalog refresh done: v{version}, {totals}")
+    return {"version": version, **totals}
+
+
+async def _maintain_booking_partitions():
+    await ensure_booking_partitions()
+    await archive_booking_partitions()
+
+
+@celery_app.task
+def maintain_booking_partitions_task():
+    logger.info("🧱 Maintaining booking partitions...")
+    run_async(_maintain_booking_partitions())
+    logger.info("✅ Booking partitions done")